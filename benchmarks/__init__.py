@@ -0,0 +1,8 @@
+"""Замеры производительности модулей task*.
+
+Каждый модуль запускается из корня репозитория отдельно, например:
+
+    python -m benchmarks.stack
+
+Размеры нагрузки задаются аргументами командной строки (см. --help каждого модуля).
+"""
@@ -0,0 +1,60 @@
+"""Замер взвешенного выбора по таблице псевдонимов AliasTable против random.choices.
+
+Таблица из --entries записей с весами редкости; random.choices замеряется с весами
+(weights, накопленные суммы пересчитываются при каждом вызове) и с заранее
+подготовленными cum_weights.
+
+Запуск: python -m benchmarks.alias [--entries 10000] [--draws 1000000]
+"""
+
+import argparse
+import itertools
+import time
+from typing import Callable
+
+from task5_2 import AliasTable, GameRandom, np
+
+
+def _measure(name: str, run: Callable[[], object], draws: int) -> None:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    print(f"{name:<36} {draws / seconds / 1e3:10.1f} тыс. выборов/с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10_000, help="число записей таблицы")
+    parser.add_argument("--draws", type=int, default=1_000_000, help="число выборов")
+    args = parser.parse_args()
+    draws = args.draws
+
+    rng = GameRandom(1)
+    entries = list(range(args.entries))
+    weights = [rng.choice((1, 10, 100, 1_000)) for _ in entries]
+    cum_weights = list(itertools.accumulate(weights))
+
+    start = time.perf_counter()
+    table = AliasTable(entries, weights)
+    print(f"построение таблицы: {(time.perf_counter() - start) * 1e3:.1f} мс на {len(table)} записей")
+
+    # По одному выбору random.choices с weights каждый раз суммирует все веса, поэтому выборов меньше.
+    single = min(draws, 100_000)
+    few = max(1, single // 100)
+    _measure("random.choices(weights, k=1)", lambda: [rng.choices(entries, weights) for _ in range(few)], few)
+    _measure(
+        "random.choices(cum_weights, k=1)",
+        lambda: [rng.choices(entries, cum_weights=cum_weights) for _ in range(single)],
+        single,
+    )
+    _measure("AliasTable.draw", lambda: [table.draw(rng) for _ in range(single)], single)
+    _measure("random.choices(weights, k=N)", lambda: rng.choices(entries, weights, k=draws), draws)
+    _measure("random.choices(cum_weights, k=N)", lambda: rng.choices(entries, cum_weights=cum_weights, k=draws), draws)
+    _measure("AliasTable.draw_many", lambda: table.draw_many(draws, rng), draws)
+    if np is not None:
+        numpy_rng = GameRandom(1, use_numpy=True)
+        _measure("AliasTable.draw_many (numpy)", lambda: table.draw_many(draws, numpy_rng), draws)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Замер ConcurrentBuffer и AsyncBuffer при одновременной работе от 1 до 64 производителей.
+
+Каждый производитель добавляет свою долю чисел пачками по --batch элементов. После замера
+проверяется, что ни одна группа не потеряна: сумма всех выведенных сумм равна сумме чисел.
+
+Запуск: python -m benchmarks.buffer_contention [--values 1000000] [--batch 50]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import List
+
+from task4 import AsyncBuffer, ConcurrentBuffer
+
+PRODUCERS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _threads(producers: int, values: int, batch: int) -> float:
+    sums: List[int] = []
+    buffer = ConcurrentBuffer(sums.append)
+    share = values // producers
+
+    def produce() -> None:
+        for start in range(0, share, batch):
+            buffer.feed([1] * min(batch, share - start))
+
+    threads = [threading.Thread(target=produce) for _ in range(producers)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - begin
+    assert sum(sums) + sum(buffer.get_current_part()) == share * producers
+    return seconds
+
+
+async def _coroutines(producers: int, values: int, batch: int) -> float:
+    buffer = AsyncBuffer()
+    share = values // producers
+    total = 0
+
+    async def produce() -> None:
+        for start in range(0, share, batch):
+            await buffer.feed([1] * min(batch, share - start))
+
+    async def consume() -> None:
+        nonlocal total
+        async for value in buffer:
+            total += value
+
+    consumer = asyncio.create_task(consume())
+    begin = time.perf_counter()
+    await asyncio.gather(*(produce() for _ in range(producers)))
+    await buffer.close()
+    await consumer
+    seconds = time.perf_counter() - begin
+    assert total + sum(buffer.get_current_part()) == share * producers
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=1_000_000, help="общее число добавляемых чисел")
+    parser.add_argument("--batch", type=int, default=50, help="размер одной пачки производителя")
+    args = parser.parse_args()
+
+    print(f"{'производителей':>14} {'потоки, млн/с':>15} {'корутины, млн/с':>17}")
+    for producers in PRODUCERS:
+        values = args.values // producers * producers
+        threads = _threads(producers, values, args.batch)
+        coroutines = asyncio.run(_coroutines(producers, values, args.batch))
+        print(f"{producers:>14} {values / threads / 1e6:>15.2f} {values / coroutines / 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Замер потоковой загрузки каталога песен SongCatalog из CSV или JSONL: строк в секунду и пиковый RSS.
+
+Файл с песнями генерируется во временном каталоге построчно; исполнители и теги
+повторяются, как в настоящих каталогах. Пиковый RSS - максимум за всю жизнь процесса,
+поэтому каждый формат замеряется отдельным запуском.
+
+Запуск: python -m benchmarks.catalog_import [--rows 1000000] [--format csv|jsonl] [--chunk-size 65536]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from task3 import SongCatalog
+
+
+def _write_rows(path: str, rows: int, file_format: str, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    tags = [f"тег {index}" for index in range(200)]
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if file_format == "csv":
+            writer.writerow(["artist", "song_name", "tags"])
+        for index in range(rows):
+            artist = f"Исполнитель {rng.randrange(rows // 20 + 1)}"
+            song_name = f"Песня {index}"
+            song_tags = rng.sample(tags, rng.randrange(4))
+            if file_format == "csv":
+                writer.writerow([artist, song_name, ";".join(song_tags)])
+            else:
+                record = {"artist": artist, "song_name": song_name, "tags": song_tags}
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _peak_rss() -> float:
+    """Пиковый RSS процесса в МБ: ru_maxrss в Linux измеряется в КБ, в macOS - в байтах."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _catalog_size(catalog: SongCatalog) -> int:
+    columns = (catalog.artist_column, catalog.name_offsets, catalog.tag_offsets, catalog.tag_column)
+    return len(catalog.name_data) + sum(column.itemsize * len(column) for column in columns)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="число песен в файле")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="формат файла")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="число строк в одной пачке")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"songs.{args.format}")
+        _write_rows(path, args.rows, args.format)
+        print(f"файл: {os.path.getsize(path) / 2**20:.1f} МБ, {args.rows} строк")
+        before = _peak_rss()
+        catalog = SongCatalog()
+        load = catalog.load_csv if args.format == "csv" else catalog.load_jsonl
+        start = time.perf_counter()
+        loaded = load(path, chunk_size=args.chunk_size)
+        seconds = time.perf_counter() - start
+
+    print(f"загружено {loaded} песен за {seconds:.2f} с, {loaded / seconds:,.0f} строк/с")
+    print(f"столбцы каталога: {_catalog_size(catalog) / 2**20:.1f} МБ, {len(catalog.artists)} исполнителей")
+    print(f"пиковый RSS: {_peak_rss():.1f} МБ (до загрузки {before:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Замер памяти и скорости создания вещей и мобов: классы со слотами против прежних классов с __dict__.
+
+Прежние представления (обычный dataclass и класс без __slots__) объявлены здесь же для сравнения.
+
+Запуск: python -m benchmarks.entities [--count 10000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from task5_2 import Item, ItemTable, Mob
+
+
+@dataclass
+class DictItem:
+    id: int
+    name: str
+    health: int = 0
+    attack: int = 0
+    defense: int = 0
+
+
+class DictMob:
+    def __init__(self, name: str, health: int, attack: int, defense: int) -> None:
+        self.name = name
+        self.health = health
+        self.attack = attack
+        self.defense = defense
+
+
+def _measure(name: str, build: Callable[[int], object], count: int) -> None:
+    start = time.perf_counter()
+    objects = build(count)
+    seconds = time.perf_counter() - start
+    del objects
+    # Память измеряется отдельным запуском: tracemalloc сильно замедляет создание объектов.
+    tracemalloc.start()
+    objects = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    print(f"{name:<28} {count / seconds / 1e6:7.2f} млн/с  {size / count:7.1f} байт на объект")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10_000_000, help="число создаваемых вещей и мобов")
+    args = parser.parse_args()
+
+    _measure("Item (dataclass)", lambda n: [DictItem(i, "Меч", 1, 2, 3) for i in range(n)], args.count)
+    _measure("Item (slots)", lambda n: [Item(i, "Меч", 1, 2, 3) for i in range(n)], args.count)
+    _measure("ItemTable", lambda n: ItemTable(Item(i, "Меч", 1, 2, 3) for i in range(n)), args.count)
+    _measure("Mob (__dict__)", lambda n: [DictMob("Гоблин", i, 5, 2) for i in range(n)], args.count)
+    _measure("Mob (slots)", lambda n: [Mob("Гоблин", i, 5, 2) for i in range(n)], args.count)
+
+
+if __name__ == "__main__":
+    main()
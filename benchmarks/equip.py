@@ -0,0 +1,66 @@
+"""Замер надевания и снятия вещей по id на инвентаре из 100 тысяч вещей.
+
+Сравниваются индексированный инвентарь Character (по одной вещи и пачкой) и прежний
+поиск перебором списка, который воспроизведен здесь же для сравнения.
+
+Запуск: python -m benchmarks.equip [--items 100000] [--ids 100000] [--operations 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import Callable, List
+
+from task5_2 import Character, Item
+
+
+def _character(items: int, ids: int, seed: int = 1) -> Character:
+    rng = random.Random(seed)
+    character = Character("Бот", 100, 10, 5)
+    for _ in range(items):
+        character.inventory.add_item(Item(rng.randrange(ids), "Вещь", 1, 1, 1))
+    return character
+
+
+def _scan_equip(inventory: List[Item], equipped: List[Item], item_id: int) -> None:
+    """Прежний алгоритм: перебор списка и удаление из середины."""
+    for index, item in enumerate(inventory):
+        if item.id == item_id:
+            equipped.append(item)
+            inventory.pop(index)
+            return
+
+
+def _measure(name: str, run: Callable[[], object], operations: int) -> None:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    seconds = time.perf_counter() - start
+    print(f"{name:<40} {seconds / operations * 1e6:10.2f} мкс на вещь")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="число вещей в инвентаре")
+    parser.add_argument("--ids", type=int, default=100_000, help="число разных id вещей")
+    parser.add_argument("--operations", type=int, default=2_000, help="число надеваемых вещей")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    targets = [item.id for item in rng.sample(_character(args.items, args.ids).inventory.items, args.operations)]
+
+    scanned = _character(args.items, args.ids)
+    inventory, equipped = list(scanned.inventory.items), []
+    _measure("перебор списка: надеть", lambda: [_scan_equip(inventory, equipped, i) for i in targets], len(targets))
+
+    character = _character(args.items, args.ids)
+    _measure("Character.equip_item", lambda: [character.equip_item(i) for i in targets], len(targets))
+    _measure("Character.unequip_item", lambda: [character.unequip_item(i) for i in targets], len(targets))
+    _measure("Character.equip_items (пачкой)", lambda: character.equip_items(targets), len(targets))
+    _measure("Character.unequip_items (пачкой)", lambda: character.unequip_items(targets), len(targets))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Замер памяти инвентарей: словари task5_1, CompactInventory с общим реестром имен и task5_2.Inventory.
+
+Имена вещей каждого игрока создаются заново, как при чтении из файла или сети, поэтому
+без интернирования одинаковые имена хранятся отдельными строками.
+
+Запуск: python -m benchmarks.inventory_memory [--players 10000] [--items 50] [--names 5000]
+"""
+
+import argparse
+import random
+import tracemalloc
+from typing import Callable, List
+
+from task5_1 import CompactInventory, ItemRegistry, add_to_inventory
+from task5_2 import Inventory, Item
+
+
+def _loot(players: int, items: int, names: int, seed: int = 1) -> List[List[str]]:
+    rng = random.Random(seed)
+    # "".join создает новую строку при каждом вызове, как при разборе входных данных.
+    return [["".join(("Вещь ", str(rng.randrange(names)))) for _ in range(items)] for _ in range(players)]
+
+
+def _measure(name: str, build: Callable[[], object], players: int) -> None:
+    tracemalloc.start()
+    inventories = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del inventories
+    print(f"{name:<45} {size / 2**20:9.1f} МБ  {size / players:9.0f} байт на игрока")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10_000, help="число инвентарей")
+    parser.add_argument("--items", type=int, default=50, help="число вещей у одного игрока")
+    parser.add_argument("--names", type=int, default=5_000, help="число разных имен вещей")
+    args = parser.parse_args()
+    players = args.players
+
+    def dicts() -> list:
+        return [add_to_inventory({}, loot) for loot in _loot(players, args.items, args.names)]
+
+    def compact() -> list:
+        registry = ItemRegistry()
+        return [CompactInventory(registry).add(loot) for loot in _loot(players, args.items, args.names)]
+
+    def items() -> list:
+        inventories = []
+        for loot in _loot(players, args.items, args.names):
+            inventory = Inventory()
+            for name in loot:
+                inventory.add_item(Item(int(name[5:]), name, 1, 1, 1))
+            inventories.append(inventory)
+        return inventories
+
+    _measure("task5_1: Dict[str, int]", dicts, players)
+    _measure("task5_1: CompactInventory + ItemRegistry", compact, players)
+    _measure("task5_2: Inventory (Item со слотами)", items, players)
+
+
+if __name__ == "__main__":
+    main()
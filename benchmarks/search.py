@@ -0,0 +1,82 @@
+"""Замер поиска песен SongSearch: построение индексов, префиксный поиск, поиск с опечатками, save/load.
+
+Названия песен собираются из небольшого словаря и номера, поэтому у частых триграмм длинные
+списки ключей - это худший для поиска с опечатками случай. Запросы берутся из названий
+каталога; в запросы для поиска с опечатками вносится одна или две случайные замены символов.
+
+Запуск: python -m benchmarks.search [--songs 1000000] [--queries 1000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+from task3 import Song, SongSearch
+
+WORDS = ["любовь", "ночь", "дорога", "город", "звезда", "ветер", "море", "небо", "огонь", "сердце"]
+
+
+def _songs(count: int, seed: int = 1) -> List[Song]:
+    rng = random.Random(seed)
+    artists = count // 10 + 1
+    return [
+        Song(f"{rng.choice(WORDS)} {rng.randrange(artists)}", f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}")
+        for index in range(count)
+    ]
+
+
+def _typo(text: str, edits: int, rng: random.Random) -> str:
+    letters = list(text)
+    for position in rng.sample(range(len(letters)), edits):
+        letters[position] = rng.choice("абвгдежзиклмнопрст")
+    return "".join(letters)
+
+
+def _measure(name: str, search: Callable[[str], object], queries: List[str]) -> None:
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    seconds = time.perf_counter() - start
+    print(f"{name:<36} {seconds / len(queries) * 1e3:8.3f} мс на запрос")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=1_000_000, help="число песен в каталоге")
+    parser.add_argument("--queries", type=int, default=1_000, help="число запросов каждого вида")
+    args = parser.parse_args()
+    songs = _songs(args.songs)
+
+    start = time.perf_counter()
+    search = SongSearch(songs)
+    print(f"построение индексов: {time.perf_counter() - start:.2f} с на {len(search)} песен")
+    # Новые ключи сортируются при первом префиксном поиске; это разовая работа, замеряется отдельно.
+    start = time.perf_counter()
+    search.prefix("")
+    print(f"сортировка ключей: {time.perf_counter() - start:.2f} с")
+
+    rng = random.Random(2)
+    names = [song.song_name for song in rng.sample(songs, args.queries)]
+    _measure("prefix, 3 символа", search.prefix, [name[:3] for name in names])
+    _measure("prefix, полное слово", search.prefix, [name.split()[0] for name in names])
+    _measure("fuzzy, короткий запрос (< 3)", search.fuzzy, [name[:2] for name in names])
+    one_typo = [_typo(name, 1, rng) for name in names]
+    _measure("fuzzy, 1 опечатка", lambda query: search.fuzzy(query, max_distance=1), one_typo)
+    _measure("fuzzy, 2 опечатки", search.fuzzy, [_typo(name, 2, rng) for name in names])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search.pickle")
+        start = time.perf_counter()
+        search.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        SongSearch.load(path)
+        loaded = time.perf_counter() - start
+        print(f"save {saved:.2f} с, load {loaded:.2f} с, файл {os.path.getsize(path) / 2**20:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Генератор нагрузки для TCP-сервера игры с отчетом p50/p99 задержки по каждому действию.
+
+Без --port сервер запускается в отдельном процессе (python task5_2.py serve PORT) на свободном
+порту localhost и останавливается после замера. Клиенты проходят сценарий из benchmarks.sessions;
+ответ сервера считается полученным, когда вывод заканчивается приглашением к вводу (": ").
+
+Запуск: python -m benchmarks.server_load [--clients 1000] [--rounds 2] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.sessions import report, scenario
+
+PROMPT_END = b": "
+
+
+async def _read_prompt(reader: asyncio.StreamReader) -> bytes:
+    """Чтение вывода сервера до очередного приглашения к вводу."""
+    data = b""
+    while not data.endswith(PROMPT_END):
+        chunk = await reader.read(65536)
+        if not chunk:
+            raise ConnectionError(f"Сервер закрыл соединение: {data[-200:].decode('utf-8', 'replace')}")
+        data += chunk
+    return data
+
+
+async def _client(
+    host: str, port: int, steps: List[Tuple[str, str]], latencies: Dict[str, List[float]]
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await _read_prompt(reader)
+        for step, answer in steps:
+            start = time.perf_counter()
+            writer.write(f"{answer}\n".encode("utf-8"))
+            await _read_prompt(reader)
+            latencies[step].append(time.perf_counter() - start)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def _run(host: str, port: int, clients: int, rounds: int) -> None:
+    steps = scenario(rounds)
+    latencies: Dict[str, List[float]] = {step: [] for step, _ in steps}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, steps, latencies) for _ in range(clients)))
+    seconds = time.perf_counter() - start
+    print(f"одновременных подключений: {clients}")
+    report(latencies, seconds)
+
+
+def _start_server() -> Tuple[subprocess.Popen, int]:
+    """Запуск сервера в отдельном процессе на свободном порту."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, os.path.join(root, "task5_2.py"), "serve", str(port)])
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, port
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError("Не удалось запустить сервер")
+            time.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1_000, help="число одновременных подключений")
+    parser.add_argument("--rounds", type=int, default=2, help="число кругов сценария на клиента")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес уже запущенного сервера")
+    parser.add_argument("--port", type=int, help="порт уже запущенного сервера")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        server, port = _start_server()
+    try:
+        asyncio.run(_run(args.host, port, args.clients, args.rounds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Нагрузочный тест asyncio-сессий игры: тысячи одновременных run_session в одном процессе.
+
+Каждый клиент проходит один и тот же сценарий (SCENARIO) через очереди сессии и замеряет
+время от отправки ответа до получения следующего приглашения к вводу.
+
+Запуск: python -m benchmarks.sessions [--sessions 10000] [--rounds 2]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from task5_2 import run_session
+
+# Шаги сценария: (название шага, ответ игрока). Вход в игру, затем круги по меню:
+# таверна с покупкой пива, просмотр инвентаря и поход в данж с нападением на моба.
+LOGIN: List[Tuple[str, str]] = [("сложность", "easy"), ("имя", "Бот")]
+ROUND: List[Tuple[str, str]] = [
+    ("таверна", "1"),
+    ("покупка напитка", "4"),
+    ("инвентарь", "3"),
+    ("выход из инвентаря", "3"),
+    ("данж", "2"),
+    ("нападение", "1"),
+]
+
+
+def scenario(rounds: int) -> List[Tuple[str, str]]:
+    """Функция получения полного сценария клиента из rounds кругов по меню."""
+    return LOGIN + ROUND * rounds
+
+
+def report(latencies: Dict[str, List[float]], seconds: float) -> None:
+    """Функция вывода p50/p99 задержки по каждому шагу сценария и общей пропускной способности."""
+    steps = sum(len(values) for values in latencies.values())
+    print(f"{'шаг':<20} {'запросов':>9} {'p50, мс':>9} {'p99, мс':>9}")
+    for step, values in latencies.items():
+        values.sort()
+        print(f"{step:<20} {len(values):>9} {_percentile(values, 0.5):>9.2f} {_percentile(values, 0.99):>9.2f}")
+    print(f"всего {steps} запросов за {seconds:.2f} с, {steps / seconds:.0f} запросов/с")
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+
+async def _client(steps: List[Tuple[str, str]], seed: int, latencies: Dict[str, List[float]]) -> None:
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    session = asyncio.create_task(run_session(inbox, outbox, seed=seed))
+    await outbox.get()
+    for step, answer in steps:
+        start = time.perf_counter()
+        await inbox.put(answer)
+        await outbox.get()
+        latencies[step].append(time.perf_counter() - start)
+    await inbox.put(None)
+    await session
+
+
+async def _run(sessions: int, rounds: int) -> None:
+    steps = scenario(rounds)
+    latencies: Dict[str, List[float]] = {step: [] for step, _ in steps}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(steps, seed, latencies) for seed in range(sessions)))
+    seconds = time.perf_counter() - start
+    print(f"одновременных сессий: {sessions}")
+    report(latencies, seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000, help="число одновременных сессий")
+    parser.add_argument("--rounds", type=int, default=2, help="число кругов сценария на сессию")
+    args = parser.parse_args()
+    asyncio.run(_run(args.sessions, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Замер сохранения и загрузки персонажей: двоичный снимок с mmap против JSON и pickle.
+
+Для каждого формата выводятся размер файла, время записи, время полной загрузки и для
+двоичного снимка отдельно время открытия файла и чтения случайных персонажей по номеру.
+
+Запуск: python -m benchmarks.snapshot [--characters 100000] [--items 10] [--reads 1000]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import random
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from task5_2 import Character, Item, Snapshot, save_snapshot, snapshot_to_json
+
+
+def _characters(count: int, items: int, seed: int = 1) -> List[Character]:
+    rng = random.Random(seed)
+    characters = []
+    for index in range(count):
+        character = Character(f"Игрок {index}", 100, 10, 5)
+        for _ in range(items):
+            item_id = rng.randrange(1_000)
+            character.inventory.add_item(Item(item_id, f"Вещь {item_id}", 1, 2, 3))
+        character.equipment.add_item(Item(1_000 + index % 10, "Доспех", 5, 0, 5))
+        character.refresh_stats()
+        characters.append(character)
+    return characters
+
+
+def _timed(run: Callable[[], object]) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = run()
+    return time.perf_counter() - start, result
+
+
+def _report(name: str, path: str, save: float, load: float) -> None:
+    size = os.path.getsize(path)
+    print(f"{name:<24} {size / 2**20:9.1f} МБ  запись {save:7.2f} с  загрузка всех {load:7.2f} с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--characters", type=int, default=100_000, help="число сохраняемых персонажей")
+    parser.add_argument("--items", type=int, default=10, help="число вещей у персонажа")
+    parser.add_argument("--reads", type=int, default=1_000, help="число случайных чтений из снимка")
+    args = parser.parse_args()
+    characters = _characters(args.characters, args.items)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "save.bin")
+        save, _ = _timed(lambda: save_snapshot(path, characters))
+        opened, snapshot = _timed(lambda: Snapshot(path))
+        with snapshot:
+            indexes = random.Random(2).choices(range(len(snapshot)), k=args.reads)
+            read, _ = _timed(lambda: [snapshot[index] for index in indexes])
+            load, _ = _timed(lambda: list(snapshot))
+        _report("save_snapshot/Snapshot", path, save, load)
+        print(f"{'':<24} открытие {opened * 1e3:.2f} мс, случайный персонаж {read / args.reads * 1e6:.1f} мкс")
+
+        path = os.path.join(directory, "save.json")
+
+        def save_json() -> None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(snapshot_to_json(characters))
+
+        def load_json() -> object:
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)
+
+        save, _ = _timed(save_json)
+        load, _ = _timed(load_json)
+        _report("snapshot_to_json", path, save, load)
+
+        path = os.path.join(directory, "save.pickle")
+
+        def save_pickle() -> None:
+            with open(path, "wb") as file:
+                pickle.dump(characters, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def load_pickle() -> object:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+
+        save, _ = _timed(save_pickle)
+        load, _ = _timed(load_pickle)
+        _report("pickle", path, save, load)
+    print("JSON загружается как словари, без создания Character")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Сравнение ExtendedStack (подкласс list) и TypedExtendedStack (массив array).
+
+Одна и та же программа выполняется вызовами методов по одной операции, одним вызовом execute
+и, для сравнения, прежним общим для обоих стеков циклом execute, который воспроизведен здесь же.
+
+Запуск: python -m benchmarks.stack [--ops 1000000]
+"""
+
+import argparse
+import time
+from array import array
+from typing import Callable, List
+
+from task2 import _OPERATIONS, ExtendedStack, Operation, TypedExtendedStack
+
+# Значение на вершине стека остается ограниченным: x -> 2 - (x * 1 + 3).
+_STEP: List[Operation] = [("append", 1), "mul", ("append", 3), "sum", ("append", 2), "sub"]
+
+
+def _by_methods(stack, repeats: int) -> None:
+    append, mul, add, sub = stack.append, stack.mul, stack.sum, stack.sub
+    for _ in range(repeats):
+        append(1)
+        mul()
+        append(3)
+        add()
+        append(2)
+        sub()
+
+
+def _shared_execute(stack: TypedExtendedStack, program: List[Operation]) -> None:
+    """Прежний цикл execute: несвязанные методы array и индексация массива на каждой операции."""
+    items, push, pop = stack.items, array.append, array.pop
+    for op in program:
+        if op.__class__ is tuple:
+            push(items, op[1])
+        elif op == "pop":
+            pop(items)
+        else:
+            items[-2] = _OPERATIONS[op](items[-1], items[-2])
+            pop(items)
+
+
+def _measure(name: str, run: Callable[[], object], ops: int) -> None:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    print(f"{name:<40} {seconds:8.3f} с  {ops / seconds / 1e6:8.2f} млн операций/с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=1_000_000, help="число операций в программе")
+    args = parser.parse_args()
+
+    repeats = args.ops // len(_STEP)
+    ops = repeats * len(_STEP)
+    program = [("append", 0)] + _STEP * repeats
+
+    _measure("ExtendedStack, методы по одному", lambda: _by_methods(ExtendedStack([0]), repeats), ops)
+    _measure("ExtendedStack.execute", lambda: ExtendedStack().execute(program), ops)
+    for typecode in ("q", "d"):
+        _measure(
+            f"TypedExtendedStack('{typecode}'), методы по одному",
+            lambda: _by_methods(TypedExtendedStack(typecode, [0]), repeats),
+            ops,
+        )
+        _measure(
+            f"TypedExtendedStack('{typecode}'), общий цикл",
+            lambda: _shared_execute(TypedExtendedStack(typecode), program),
+            ops,
+        )
+        _measure(f"TypedExtendedStack('{typecode}').execute", lambda: TypedExtendedStack(typecode).execute(program), ops)
+
+
+if __name__ == "__main__":
+    main()
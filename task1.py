@@ -5,12 +5,20 @@
 [date] - 07.05.2024
 """
 
+import contextlib
+import sys
 from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Tuple
 
 
 class Animal(ABC):
     """Абстрактный класс представляющий животных.
+
+    Атрибут sound - один звук животного. render и render_batch выводят его сами, только если
+    say животного - это Cat.say или Dog.say; иначе звуки выводятся через метод say.
     """
+    sound: str = ""
+
     @abstractmethod
     def say(self, times: int) -> None:
         """Функция вывода производимых животным звуков в консоль, определенное колличество раз.
@@ -24,25 +32,29 @@ class Animal(ABC):
 class Cat(Animal):
     """Класс представляющий кошек.
     """
+    sound = "Meow "
+
     def say(self, times: int) -> None:
         """Функция, воспроизведения звуков кошки.
 
         Args:
             times (int): Число, сколько раз необходимо повторить звук.
         """
-        print("Meow " * times)
+        _write_sound(self.sound, times)
 
 
 class Dog(Animal):
     """Класс представляющий собак
     """
+    sound = "Bow-Wow "
+
     def say(self, times: int) -> None:
         """Функция, воспроизведения звуков собак.
 
         Args:
             times (int): Число, сколько раз необходимо повторить звук
         """
-        print("Bow-Wow " * times)
+        _write_sound(self.sound, times)
 
 
 class CatDog(Cat, Dog):
@@ -52,6 +64,97 @@ class CatDog(Cat, Dog):
 class DogCat(Dog, Cat):
     pass
 
+
+# Методы say, которые просто повторяют атрибут sound; вывод остальных известен только им самим.
+_SOUND_SAYS = {Cat.say, Dog.say}
+
+
+def _sound(animal: Animal) -> str:
+    """Звук, который render может выводить сам, или пустая строка, если нужно вызвать say."""
+    return animal.sound if type(animal).say in _SOUND_SAYS else ""
+
+
+def render(animal: Animal, times: int, sink: Optional[TextIO] = None, chunk_size: int = 1 << 16) -> None:
+    """Функция потокового вывода звуков животного частями фиксированного размера.
+
+    Выводится то же самое, что и при вызове say (звук берется из атрибута sound), но строка
+    звуков не собирается целиком: в sink записываются куски не длиннее примерно chunk_size
+    символов, поэтому расход памяти не зависит от times. Для животных без атрибута sound
+    или с собственным методом say вызывается их say, вывод которого перенаправляется в sink.
+
+    Args:
+        animal (Animal): животное
+        times (int): Число, сколько раз необходимо повторить звук.
+        sink (Optional[TextIO]): объект с методом write, по умолчанию консоль
+        chunk_size (int): примерный размер одной записи в символах
+    """
+    sink = sys.stdout if sink is None else sink
+    sound = _sound(animal)
+    if not sound:
+        with contextlib.redirect_stdout(sink):
+            animal.say(times)
+        return
+    _write_sound(sound, times, sink, chunk_size)
+
+
+def _write_sound(sound: str, times: int, sink: Optional[TextIO] = None, chunk_size: int = 1 << 16) -> None:
+    """Запись звука, повторенного times раз, в sink частями примерно по chunk_size символов."""
+    write = (sys.stdout if sink is None else sink).write
+    if times > 0 and sound:
+        per_chunk = max(1, chunk_size // len(sound))
+        chunk = sound * min(per_chunk, times)
+        full, rest = divmod(times, per_chunk)
+        for _ in range(full):
+            write(chunk)
+        if rest:
+            write(sound * rest)
+    write("\n")
+
+
+def render_batch(
+    animals: Iterable[Tuple[Animal, int]], sink: Optional[TextIO] = None, buffer_size: int = 1 << 16
+) -> None:
+    """Функция вывода звуков множества животных буферизованными записями.
+
+    Животные группируются по методу say, найденному через MRO (CatDog попадает в группу Cat,
+    DogCat - в группу Dog); внутри группы порядок животных сохраняется. Строки звуков
+    накапливаются в буфере и записываются в sink одним вызовом write, как только
+    буфер достигает buffer_size символов. Очень длинные строки и животные без атрибута
+    sound или с собственным методом say выводятся через render.
+
+    Args:
+        animals (Iterable[Tuple[Animal, int]]): пары (животное, число повторений звука)
+        sink (Optional[TextIO]): объект с методом write, по умолчанию консоль
+        buffer_size (int): размер буфера в символах
+    """
+    sink = sys.stdout if sink is None else sink
+    groups: Dict[Callable, List[Tuple[Animal, int]]] = {}
+    for animal, times in animals:
+        groups.setdefault(type(animal).say, []).append((animal, times))
+
+    pending: List[str] = []
+    pending_size = 0
+    for group in groups.values():
+        for animal, times in group:
+            sound = _sound(animal)
+            size = len(sound) * max(times, 0) + 1
+            if not sound or size > buffer_size:
+                if pending:
+                    sink.write("".join(pending))
+                    pending.clear()
+                    pending_size = 0
+                render(animal, times, sink, buffer_size)
+                continue
+            pending.append(sound * times + "\n")
+            pending_size += size
+            if pending_size >= buffer_size:
+                sink.write("".join(pending))
+                pending.clear()
+                pending_size = 0
+    if pending:
+        sink.write("".join(pending))
+
+
 if __name__ == "__main__":
     muteDog = CatDog()
     muteDog.say(3)
@@ -5,7 +5,31 @@
 [date] - 07.05.2024
 """
 
-from typing import Union
+import functools
+import operator
+from array import array
+from typing import Callable, Iterable, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для LaneProgram
+    np = None
+
+
+class Arg(NamedTuple):
+    """Ссылка на входной аргумент программы, подставляемый при её выполнении."""
+
+    index: int
+
+
+Operation = Union[str, Tuple[str, Union[int, float, str, Arg]]]
+
+_OPERATIONS = {
+    "sum": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.floordiv,
+}
 
 
 class ExtendedStack(list):
@@ -61,6 +85,380 @@ class ExtendedStack(list):
         """Операция удаление элемента с вершины стека"""
         super().pop()
 
+    def execute(self, program: Iterable[Operation]) -> Optional[Union[int, float, str]]:
+        """Выполнение целой программы операций над стеком за один вызов.
+
+        Программа - последовательность операций, где ("append", x) кладёт x на вершину стека,
+        а строки "sum", "sub", "mul", "div" и "pop" выполняют одноименные операции.
+        Операции выполняются напрямую над списком, без вызова переопределенных методов.
+
+        Args:
+            program (Iterable[Operation]): последовательность операций.
+
+        Returns:
+            Optional[Union[int, float, str]]: элемент на вершине стека после выполнения программы.
+        """
+        _execute(self, list.append, list.pop, program)
+        return self[-1] if self else None
+
+
+class TypedExtendedStack:
+    """Расширенный стек, хранящий числа одного типа в непрерывном массиве array.
+
+    Поддерживает тот же набор операций, что и ExtendedStack, но элементы хранятся
+    не как отдельные объекты Python, а в типизированном буфере ("q" - int64, "d" - float64).
+    Строки и числа, не помещающиеся в выбранный тип, не поддерживаются.
+    """
+
+    def __init__(self, typecode: str = "q", items: Iterable[Union[int, float]] = ()) -> None:
+        if typecode not in ("q", "d"):
+            raise ValueError("Поддерживаются только типы 'q' (int64) и 'd' (float64)")
+        self.items = array(typecode, items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> Union[int, float]:
+        return self.items[index]
+
+    def __repr__(self) -> str:
+        return repr(self.items.tolist())
+
+    def _apply(self, name: str) -> Union[int, float]:
+        items = self.items
+        result = _OPERATIONS[name](items[-1], items[-2])
+        # Результат записывается на место второго операнда до удаления вершины: если он
+        # не помещается в тип массива, OverflowError оставит стек без изменений.
+        items[-2] = result
+        del items[-1]
+        return result
+
+    def sum(self) -> Union[int, float]:
+        """Операция сложения двух элементов с вершины стека."""
+        return self._apply("sum")
+
+    def sub(self) -> Union[int, float]:
+        """Операция вычитания двух элементов с вершины стека."""
+        return self._apply("sub")
+
+    def mul(self) -> Union[int, float]:
+        """Операция умножения двух элементов с вершины стека."""
+        return self._apply("mul")
+
+    def div(self) -> Union[int, float]:
+        """Операция целочисленного деления двух элементов с вершины стека."""
+        return self._apply("div")
+
+    def append(self, item: Union[int, float]) -> None:
+        """Операция добавления элемента на вершину стека"""
+        self.items.append(item)
+
+    def pop(self) -> None:
+        """Операция удаление элемента с вершины стека"""
+        self.items.pop()
+
+    def execute(self, program: Iterable[Operation]) -> Optional[Union[int, float]]:
+        """Выполнение целой программы операций над стеком за один вызов.
+
+        Args:
+            program (Iterable[Operation]): последовательность операций, как в ExtendedStack.execute.
+
+        Returns:
+            Optional[Union[int, float]]: элемент на вершине стека после выполнения программы.
+        """
+        items = self.items
+        _execute_typed(items, program)
+        return items[-1] if items else None
+
+
+def _execute(stack, push, pop, program: Iterable[Operation]) -> None:
+    """Цикл выполнения программы для ExtendedStack.
+
+    Args:
+        stack: стек, хранящий элементы как список.
+        push: несвязанный метод list.append.
+        pop: несвязанный метод list.pop.
+        program (Iterable[Operation]): последовательность операций.
+    """
+    operations = _OPERATIONS
+    for op in program:
+        if op.__class__ is tuple:
+            if op[0] != "append":
+                raise ValueError(f"Неизвестная операция: {op[0]}")
+            push(stack, op[1])
+        elif op == "pop":
+            pop(stack)
+        else:
+            function = operations.get(op)
+            if function is None:
+                raise ValueError(f"Неизвестная операция: {op}")
+            # Стек меняется только после успешного вычисления, поэтому ZeroDivisionError
+            # не теряет операнды.
+            stack[-2] = function(stack[-1], stack[-2])
+            pop(stack)
+
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+# Пустое значение регистра в _execute_typed.
+_EMPTY = object()
+
+
+def _execute_typed(items: array, program: Iterable[Operation]) -> None:
+    """Цикл выполнения программы для TypedExtendedStack.
+
+    На время выполнения элементы переносятся в список Python, чтобы каждая операция не
+    упаковывала числа из массива заново, а только что добавленное значение держится в
+    локальной переменной: следующая за ним операция берет его оттуда, не добавляя в список.
+    Добавляемые значения приводятся к типу массива так же, как это сделал бы array.append,
+    а результаты операций над int64 проверяются на переполнение, поэтому ошибки возникают
+    на тех же операциях. После выполнения, в том числе при ошибке, стек записывается
+    обратно в массив.
+
+    Args:
+        items (array): элементы стека.
+        program (Iterable[Operation]): последовательность операций.
+    """
+    typecode = items.typecode
+    native = int if typecode == "q" else float
+    check_range = typecode == "q"
+    minimum, maximum = _INT64_MIN, _INT64_MAX
+    operations = _OPERATIONS
+    empty = _EMPTY
+    stack = items.tolist()
+    push = stack.append
+    pop = stack.pop
+    # Вершина стека, еще не добавленная в stack.
+    pending = empty
+    try:
+        for op in program:
+            if op.__class__ is tuple:
+                if op[0] != "append":
+                    raise ValueError(f"Неизвестная операция: {op[0]}")
+                value = op[1]
+                if value.__class__ is not native:
+                    # int в массиве 'd' становится float, остальное приводит (или отвергает) сам массив.
+                    value = float(value) if value.__class__ is int and not check_range else array(typecode, [value])[0]
+                elif check_range and not minimum <= value <= maximum:
+                    value = array(typecode, [value])[0]
+                if pending is not empty:
+                    push(pending)
+                pending = value
+            elif op == "pop":
+                if pending is empty:
+                    pop()
+                else:
+                    pending = empty
+            else:
+                function = operations.get(op)
+                if function is None:
+                    raise ValueError(f"Неизвестная операция: {op}")
+                if pending is empty:
+                    result = function(stack[-1], stack[-2])
+                    if check_range and not minimum <= result <= maximum:
+                        raise OverflowError("Результат операции не помещается в int64")
+                    stack[-2] = result
+                    pop()
+                else:
+                    result = function(pending, stack[-1])
+                    if check_range and not minimum <= result <= maximum:
+                        raise OverflowError("Результат операции не помещается в int64")
+                    stack[-1] = result
+                    pending = empty
+    finally:
+        if pending is not empty:
+            push(pending)
+        items[:] = array(typecode, stack)
+
+
+def _check_program(program: Iterable[Operation]) -> Tuple[Tuple[Operation, ...], int]:
+    """Проверка программы и вычисление глубины стека на этапе разбора.
+
+    Args:
+        program (Iterable[Operation]): последовательность операций.
+
+    Raises:
+        ValueError: неизвестная операция или пустой стек в конце программы.
+        IndexError: операции не хватает элементов в стеке.
+
+    Returns:
+        Tuple[Tuple[Operation, ...], int]: проверенные операции и число аргументов программы.
+    """
+    steps = []
+    depth = 0
+    arity = 0
+    for op in program:
+        if op.__class__ is tuple:
+            if op[0] != "append":
+                raise ValueError(f"Неизвестная операция: {op[0]}")
+            if isinstance(op[1], Arg):
+                arity = max(arity, op[1].index + 1)
+            depth += 1
+        elif op == "pop" or op in _OPERATIONS:
+            if depth < (1 if op == "pop" else 2):
+                raise IndexError("pop from empty list")
+            depth -= 1
+        else:
+            raise ValueError(f"Неизвестная операция: {op}")
+        steps.append(op)
+    if depth == 0:
+        raise ValueError("После выполнения программы стек пуст")
+    return tuple(steps), arity
+
+
+_SOURCE_OPERATORS = {"sum": "+", "sub": "-", "mul": "*", "div": "//"}
+
+
+def compile_program(program: Iterable[Operation]) -> Callable[..., Union[int, float, str]]:
+    """Компиляция программы над стеком в отдельную функцию Python.
+
+    Глубина стека вычисляется при компиляции, поэтому каждая ячейка стека становится
+    локальной переменной и во время выполнения стек не создаётся вовсе. Аргументы
+    задаются как ("append", Arg(i)) и передаются в функцию позиционно. Скомпилированные
+    программы кэшируются по последовательности операций; программы с нехешируемыми
+    константами (например, ("append", [1])) компилируются каждый раз заново.
+
+    Args:
+        program (Iterable[Operation]): последовательность операций.
+
+    Returns:
+        Callable[..., Union[int, float, str]]: функция, возвращающая вершину стека после выполнения программы.
+    """
+    program = tuple(program)
+    # Типы констант входят в ключ кэша: 1, 1.0 и True равны между собой, но дают разные результаты.
+    constant_types = tuple(type(op[1]) for op in program if op.__class__ is tuple)
+    try:
+        hash(program)
+    except TypeError:
+        return _compile_program.__wrapped__(program, constant_types)
+    return _compile_program(program, constant_types)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_program(program: Tuple[Operation, ...], constant_types: Tuple[type, ...]) -> Callable[..., Union[int, float, str]]:
+    steps, arity = _check_program(program)
+    namespace = {}
+    lines = [f"def compiled({', '.join(f'a{i}' for i in range(arity))}):"]
+    depth = 0
+    for op in steps:
+        if op.__class__ is tuple:
+            value = op[1]
+            if isinstance(value, Arg):
+                lines.append(f"    s{depth} = a{value.index}")
+            else:
+                name = f"c{len(namespace)}"
+                namespace[name] = value
+                lines.append(f"    s{depth} = {name}")
+            depth += 1
+        elif op == "pop":
+            depth -= 1
+        else:
+            depth -= 1
+            lines.append(f"    s{depth - 1} = s{depth} {_SOURCE_OPERATORS[op]} s{depth - 1}")
+    lines.append(f"    return s{depth - 1}")
+    exec("\n".join(lines), namespace)
+    return namespace["compiled"]
+
+
+class LaneProgram:
+    """Программа над стеком, выполняемая сразу для многих наборов входных данных.
+
+    Последовательность операций разбирается один раз: глубина стека известна заранее,
+    поэтому каждая ячейка стека - это столбец numpy, а каждая операция - одно векторное
+    вычисление над всеми наборами ("дорожками") сразу. Аргументы в программе задаются
+    как ("append", Arg(i)), остальные значения в ("append", x) считаются константами.
+    Порядок операндов (вершина op предыдущий) и целочисленное деление с округлением вниз
+    совпадают с ExtendedStack.
+    """
+
+    def __init__(self, program: Iterable[Operation]) -> None:
+        if np is None:
+            raise ImportError("Для LaneProgram необходим numpy")
+        self.steps, self.arity = _check_program(program)
+
+    def evaluate(self, inputs: Sequence[Sequence[Union[int, float]]]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Выполнение программы для всех наборов входных данных.
+
+        Целые числа считаются в int64. Дорожки, где промежуточный результат вышел за пределы
+        int64 (ExtendedStack вернул бы длинное целое Python), отмечаются в маске ошибок так же,
+        как деление на ноль.
+
+        Args:
+            inputs (Sequence[Sequence[Union[int, float]]]): N наборов аргументов, массив формы (N, arity).
+
+        Raises:
+            ValueError: массив неверной формы, значения или константы не числа или не помещаются в int64.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: значения на вершине стека для каждой дорожки и маска дорожек,
+            в которых произошло деление на ноль (там, где ExtendedStack выбросил бы ZeroDivisionError)
+            или переполнение int64. Значения в таких дорожках не определены.
+        """
+        columns = _lane_array(inputs)
+        if columns.ndim != 2 or columns.shape[1] < self.arity:
+            raise ValueError(f"Ожидается массив формы (N, {self.arity})")
+        lanes = columns.shape[0]
+        errors = np.zeros(lanes, dtype=bool)
+        stack = []
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for op in self.steps:
+                if op.__class__ is tuple:
+                    value = op[1]
+                    if isinstance(value, Arg):
+                        stack.append(columns[:, value.index])
+                    else:
+                        stack.append(np.full(lanes, _lane_array(value)))
+                elif op == "pop":
+                    stack.pop()
+                else:
+                    top = stack.pop()
+                    second = stack.pop()
+                    if op == "div":
+                        errors |= second == 0
+                    result = _LANE_OPERATIONS[op](top, second)
+                    if result.dtype == np.int64:
+                        errors |= _int64_overflow(op, top, second, result)
+                    stack.append(result)
+        return np.broadcast_to(stack[-1], (lanes,)).copy(), errors
+
+
+def _lane_array(values: object) -> "np.ndarray":
+    """Массив входных данных или константа LaneProgram: целые приводятся к int64, float остаются float64."""
+    array = np.asarray(values)
+    if array.dtype.kind == "u":
+        if array.size and int(array.max()) > np.iinfo(np.int64).max:
+            raise ValueError("Целые числа должны помещаться в int64")
+        return array.astype(np.int64)
+    if array.dtype.kind == "i":
+        return array.astype(np.int64, copy=False)
+    if array.dtype.kind == "f":
+        return array.astype(np.float64, copy=False)
+    raise ValueError("Входные данные и константы должны быть числами, целые - в пределах int64")
+
+
+def _int64_overflow(op: str, top: "np.ndarray", second: "np.ndarray", result: "np.ndarray") -> "np.ndarray":
+    """Маска дорожек, в которых операция int64 переполнилась и результат result обрезан."""
+    if op == "sum":
+        return ((top ^ result) & (second ^ result)) < 0
+    if op == "sub":
+        return ((top ^ second) & (top ^ result)) < 0
+    minimum = np.iinfo(np.int64).min
+    if op == "mul":
+        # Без переполнения result // second == top точно; при переполнении result отличается
+        # от top * second на кратное 2**64, что больше |second|. Исключение - MIN * -1.
+        nonzero = second != 0
+        check = np.where(nonzero, second, 1)
+        return (nonzero & (result // check != top)) | ((top == minimum) & (second == -1))
+    return (top == minimum) & (second == -1)
+
+
+_LANE_OPERATIONS = {
+    "sum": np.add,
+    "sub": np.subtract,
+    "mul": np.multiply,
+    "div": np.floor_divide,
+} if np is not None else {}
+
 
 if __name__ == "__main__":
     qq = ExtendedStack()
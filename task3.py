@@ -5,6 +5,17 @@
 [date] - 07.05.2024
 """
 
+import csv
+import heapq
+import json
+import pickle
+import weakref
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
 
 class Song:
     def __init__(self, artist: str, song_name: str) -> None:
@@ -12,7 +23,592 @@ class Song:
         self.song_name = song_name
 
     def add_tags(self, *args):
+        old_tags = getattr(self, "tags", ())
         self.tags = args
+        for library in _LIBRARIES.get(self, ()):
+            library._retag(self, old_tags, args)
+
+
+# Библиотеки, в которые добавлена песня; ссылки слабые, чтобы не удерживать ни песни, ни библиотеки.
+_LIBRARIES: "weakref.WeakKeyDictionary[Song, weakref.WeakSet[SongLibrary]]" = weakref.WeakKeyDictionary()
+
+
+class SongLibrary:
+    """Коллекция песен с обратными индексами тег -> песни и исполнитель -> песни.
+
+    Каждой песне выдается целочисленный id, индексы хранят отсортированные списки id
+    в массивах array, а запросы по тегам выполняются операциями над множествами id.
+    Повторный вызов add_tags у песни из библиотеки обновляет индекс тегов.
+    """
+
+    def __init__(self, songs: Iterable[Song] = ()) -> None:
+        self.songs: List[Optional[Song]] = []
+        self.ids: Dict[Song, int] = {}
+        self.tags: Dict[str, array] = {}
+        self.artists: Dict[str, array] = {}
+        for song in songs:
+            self.add(song)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, song: Song) -> int:
+        """Функция добавления песни в библиотеку.
+
+        Args:
+            song (Song): песня
+
+        Returns:
+            int: id песни в библиотеке
+        """
+        song_id = self.ids.get(song)
+        if song_id is not None:
+            return song_id
+        song_id = self.ids[song] = len(self.songs)
+        self.songs.append(song)
+        _insert(self.artists, song.artist, song_id)
+        for tag in set(getattr(song, "tags", ())):
+            _insert(self.tags, tag, song_id)
+        _LIBRARIES.setdefault(song, weakref.WeakSet()).add(self)
+        return song_id
+
+    def remove(self, song: Song) -> None:
+        """Функция удаления песни из библиотеки.
+
+        Args:
+            song (Song): песня
+        """
+        song_id = self.ids.pop(song)
+        self.songs[song_id] = None
+        _discard(self.artists, song.artist, song_id)
+        for tag in set(getattr(song, "tags", ())):
+            _discard(self.tags, tag, song_id)
+        _LIBRARIES[song].discard(self)
+
+    def find(
+        self,
+        all_tags: Iterable[str] = (),
+        any_tags: Iterable[str] = (),
+        not_tags: Iterable[str] = (),
+        artist: Optional[str] = None,
+    ) -> List[Song]:
+        """Функция поиска песен по тегам и исполнителю.
+
+        Args:
+            all_tags (Iterable[str]): теги, которые должны быть у песни все сразу (И)
+            any_tags (Iterable[str]): теги, хотя бы один из которых должен быть у песни (ИЛИ)
+            not_tags (Iterable[str]): теги, которых не должно быть у песни (НЕ)
+            artist (Optional[str]): исполнитель
+
+        Returns:
+            List[Song]: найденные песни в порядке добавления в библиотеку
+        """
+        postings = [self.tags.get(tag, ()) for tag in all_tags]
+        if artist is not None:
+            postings.append(self.artists.get(artist, ()))
+        any_tags = list(any_tags)
+        if any_tags:
+            postings.append(set().union(*(self.tags.get(tag, ()) for tag in any_tags)))
+        if postings:
+            postings.sort(key=len)
+            found = set(postings[0])
+            for posting in postings[1:]:
+                found.intersection_update(posting)
+        else:
+            found = set(self.ids.values())
+        for tag in not_tags:
+            found.difference_update(self.tags.get(tag, ()))
+        return [self.songs[song_id] for song_id in sorted(found)]
+
+    def _retag(self, song: Song, old_tags: Iterable[str], new_tags: Iterable[str]) -> None:
+        """Обновление индекса тегов после повторного вызова add_tags."""
+        song_id = self.ids[song]
+        old_tags, new_tags = set(old_tags), set(new_tags)
+        for tag in old_tags - new_tags:
+            _discard(self.tags, tag, song_id)
+        for tag in new_tags - old_tags:
+            _insert(self.tags, tag, song_id)
+
+
+class SongCatalog:
+    """Компактное хранилище большого каталога песен по столбцам.
+
+    Исполнители и теги хранятся один раз в таблицах строк, а у песен - только их номера
+    в массивах array; названия песен хранятся подряд в одном буфере UTF-8. Объекты Song
+    создаются только при обращении catalog[i].
+    """
+
+    def __init__(self) -> None:
+        self.artists: List[str] = []
+        self.tag_names: List[str] = []
+        self._artist_ids: Dict[str, int] = {}
+        self._tag_ids: Dict[str, int] = {}
+        self.artist_column = array("I")
+        self.name_offsets = array("Q", [0])
+        self.name_data = bytearray()
+        self.tag_offsets = array("Q", [0])
+        self.tag_column = array("I")
+
+    def __len__(self) -> int:
+        return len(self.artist_column)
+
+    def __getitem__(self, index: int) -> Song:
+        if index < 0:
+            index += len(self)
+        song = Song(self.artists[self.artist_column[index]], self.song_name(index))
+        tags = self.tag_column[self.tag_offsets[index] : self.tag_offsets[index + 1]]
+        if tags:
+            song.add_tags(*(self.tag_names[tag] for tag in tags))
+        return song
+
+    def __iter__(self) -> Iterator[Song]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def song_name(self, index: int) -> str:
+        """Функция получения названия песни без создания объекта Song."""
+        return self.name_data[self.name_offsets[index] : self.name_offsets[index + 1]].decode("utf-8")
+
+    def append(self, artist: str, song_name: str, tags: Sequence[str] = ()) -> None:
+        """Функция добавления песни в каталог.
+
+        Args:
+            artist (str): исполнитель
+            song_name (str): название песни
+            tags (Sequence[str]): теги песни
+        """
+        self.extend([(artist, song_name, tags)])
+
+    def extend(self, rows: Iterable[Tuple[str, str, Sequence[str]]]) -> int:
+        """Функция добавления пачки песен в каталог.
+
+        Пачка добавляется целиком или не добавляется совсем: если чтение строк или
+        их разбор упадет посередине, каталог возвращается к состоянию до вызова.
+
+        Args:
+            rows (Iterable[Tuple[str, str, Sequence[str]]]): тройки (исполнитель, название, теги)
+
+        Raises:
+            TypeError: ошибка вызываемая, если теги песни переданы одной строкой
+
+        Returns:
+            int: число добавленных песен
+        """
+        artist_ids = self._artist_ids
+        tag_ids = self._tag_ids
+        artists = []
+        tags = []
+        tag_ends = []
+        name_ends = []
+        names = self.name_data
+        tag_end = len(self.tag_column)
+        names_size, artists_count, tags_count = len(names), len(self.artists), len(self.tag_names)
+        try:
+            for artist, song_name, song_tags in rows:
+                if isinstance(song_tags, str):
+                    raise TypeError(f"Теги песни {song_name!r} должны быть последовательностью строк, а не строкой")
+                artist_id = artist_ids.get(artist)
+                if artist_id is None:
+                    artist_id = artist_ids[artist] = len(self.artists)
+                    self.artists.append(artist)
+                artists.append(artist_id)
+                names += song_name.encode("utf-8")
+                name_ends.append(len(names))
+                for tag in song_tags:
+                    tag_id = tag_ids.get(tag)
+                    if tag_id is None:
+                        tag_id = tag_ids[tag] = len(self.tag_names)
+                        self.tag_names.append(tag)
+                    tags.append(tag_id)
+                tag_end += len(song_tags)
+                tag_ends.append(tag_end)
+        except BaseException:
+            del names[names_size:]
+            for artist in self.artists[artists_count:]:
+                del artist_ids[artist]
+            del self.artists[artists_count:]
+            for tag in self.tag_names[tags_count:]:
+                del tag_ids[tag]
+            del self.tag_names[tags_count:]
+            raise
+        self.artist_column.extend(artists)
+        self.name_offsets.extend(name_ends)
+        self.tag_column.extend(tags)
+        self.tag_offsets.extend(tag_ends)
+        return len(artists)
+
+    def load_csv(
+        self, path: str, chunk_size: int = 65536, tag_separator: str = ";", header: bool = True
+    ) -> int:
+        """Функция потоковой загрузки песен из CSV-файла со столбцами исполнитель, название, теги.
+
+        Файл читается построчно и добавляется в каталог пачками по chunk_size строк. Если файл
+        содержит ошибку, в каталоге остаются только пачки, полностью прочитанные до неё.
+
+        Args:
+            path (str): путь к файлу
+            chunk_size (int): число строк в одной пачке
+            tag_separator (str): разделитель тегов в столбце тегов
+            header (bool): первая строка файла - заголовок
+
+        Returns:
+            int: число загруженных песен
+        """
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            if header:
+                next(reader, None)
+            rows = (
+                (row[0], row[1], row[2].split(tag_separator) if len(row) > 2 and row[2] else ())
+                for row in reader
+            )
+            return self._load_chunks(rows, chunk_size)
+
+    def load_jsonl(self, path: str, chunk_size: int = 65536) -> int:
+        """Функция потоковой загрузки песен из JSONL-файла.
+
+        Каждая строка файла - объект с полями artist, song_name и необязательным списком tags;
+        одна строка вместо списка в tags считается единственным тегом. Если файл содержит
+        ошибку, в каталоге остаются только пачки, полностью прочитанные до неё.
+
+        Args:
+            path (str): путь к файлу
+            chunk_size (int): число строк в одной пачке
+
+        Returns:
+            int: число загруженных песен
+        """
+        with open(path, encoding="utf-8") as file:
+            records = (json.loads(line) for line in file if line.strip())
+            rows = (
+                (record["artist"], record["song_name"], _tag_list(record.get("tags", ())))
+                for record in records
+            )
+            return self._load_chunks(rows, chunk_size)
+
+    def _load_chunks(self, rows: Iterator[Tuple[str, str, Sequence[str]]], chunk_size: int) -> int:
+        loaded = 0
+        while True:
+            added = self.extend(islice(rows, chunk_size))
+            if not added:
+                return loaded
+            loaded += added
+
+
+class SongSearch:
+    """Поиск песен по началу и с опечатками в названии песни или имени исполнителя.
+
+    Названия и исполнители приводятся к нижнему регистру и становятся ключами. Префиксный
+    индекс - отсортированный список ключей, в котором диапазон ключей с нужным началом
+    находится двоичным поиском. Для поиска с опечатками ключи разбиваются на триграммы:
+    кандидаты отбираются по числу общих триграмм с запросом и проверяются расстоянием
+    Левенштейна; при одной допустимой опечатке вместо этого перебираются строки на
+    расстоянии 1 от запроса, вставляемые символы для которых подсказывают триграммы каталога.
+    Индексы пополняются по одной песне и сохраняются на диск методом save. Ограничения на число
+    опечаток и время поиска описаны в методе fuzzy.
+    """
+
+    def __init__(self, songs: Iterable[Song] = ()) -> None:
+        self.songs: List[Song] = []
+        self.keys: List[str] = []
+        self.sorted_keys: List[str] = []
+        self.postings: Dict[str, array] = {}
+        self.trigrams: Dict[str, array] = {}
+        # Пара соседних символов -> символы, встречавшиеся между ними в триграммах ключей:
+        # только они могут быть вставлены или подставлены в запрос при одной опечатке.
+        self.middles: Dict[str, set] = {}
+        # Новые ключи попадают в sorted_keys не сразу, а перед ближайшим префиксным поиском.
+        self._unsorted_keys: List[str] = []
+        self.extend(songs)
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def add(self, song: Song) -> int:
+        """Функция добавления песни в индексы поиска.
+
+        Args:
+            song (Song): песня
+
+        Returns:
+            int: id песни в индексе
+        """
+        song_id = len(self.songs)
+        self.songs.append(song)
+        for key in {song.song_name.lower(), song.artist.lower()}:
+            posting = self.postings.get(key)
+            if posting is None:
+                self.postings[key] = array("I", [song_id])
+                self._add_key(key)
+            else:
+                posting.append(song_id)
+        return song_id
+
+    def extend(self, songs: Iterable[Song]) -> None:
+        """Функция добавления нескольких песен в индексы поиска."""
+        for song in songs:
+            self.add(song)
+
+    def prefix(self, query: str, k: int = 10) -> List[Song]:
+        """Функция поиска песен, у которых название или исполнитель начинается с query.
+
+        Args:
+            query (str): начало названия или имени исполнителя
+            k (int): наибольшее число результатов
+
+        Returns:
+            List[Song]: найденные песни в алфавитном порядке ключей
+        """
+        query = query.lower()
+        keys = self._sorted_keys()
+        found: Dict[int, None] = {}
+        for position in range(bisect_left(keys, query), len(keys)):
+            key = keys[position]
+            if not key.startswith(query):
+                break
+            for song_id in self.postings[key]:
+                found[song_id] = None
+                if len(found) == k:
+                    return [self.songs[song_id] for song_id in found]
+        return [self.songs[song_id] for song_id in found]
+
+    def fuzzy(self, query: str, k: int = 10, max_distance: int = 2) -> List[Song]:
+        """Функция поиска песен по названию или исполнителю с учетом опечаток.
+
+        Число допустимых опечаток ограничено длиной запроса: для запросов короче 3 символов
+        ищется точное совпадение, а расстояние d > 1 допускается, только если у запроса не
+        меньше 3 * d + 2 разных триграмм (обычно это запросы от 7 символов). Иначе кандидатом
+        оказался бы почти каждый ключ с той же первой буквой, и поиск на большом каталоге
+        занимал бы сотни миллисекунд.
+
+        При d = 1 ключи ищутся среди вариантов запроса с одной заменой, вставкой или удалением
+        символа. Вставляются только символы, которые в каталоге встречались между теми же
+        соседями, поэтому число вариантов - это сумма размеров таких наборов по позициям
+        запроса: оно не больше 2 * len(query) * размер алфавита каталога, но на практике
+        ограничено символами одной письменности и почти не растет вместе с каталогом. При d > 1 кандидаты
+        отбираются по триграммам, и время растет с размером каталога: на миллионе песен
+        со случайными названиями такой запрос занимает несколько миллисекунд, а если названия
+        собраны из небольшого словаря и различаются в основном номерами - десятки миллисекунд.
+
+        Args:
+            query (str): название или имя исполнителя
+            k (int): наибольшее число результатов
+            max_distance (int): наибольшее расстояние Левенштейна между query и ключом
+
+        Returns:
+            List[Song]: найденные песни, сначала ближайшие к query
+        """
+        query = query.lower()
+        query_trigrams = _trigrams(query)
+        # Каждая правка портит не больше трех триграмм, так что у подходящего ключа
+        # общих с запросом триграмм не меньше чем len(query_trigrams) - 3 * max_distance.
+        if len(query) < 3:
+            max_distance = 0
+        else:
+            max_distance = min(max_distance, max(1, (len(query_trigrams) - 2) // 3))
+        if max_distance <= 0:
+            return [self.songs[song_id] for song_id in self.postings.get(query, ())[:k]]
+        if max_distance == 1:
+            matches = self.postings.keys() & _one_edit_variants(query, self.middles)
+            ranked = [(int(key != query), 0, key) for key in matches]
+        else:
+            ranked = self._trigram_matches(query, query_trigrams, max_distance)
+        found: Dict[int, None] = {}
+        for _, _, key in heapq.nsmallest(k, ranked):
+            for song_id in self.postings[key]:
+                found[song_id] = None
+                if len(found) == k:
+                    return [self.songs[song_id] for song_id in found]
+        return [self.songs[song_id] for song_id in found]
+
+    def _trigram_matches(
+        self, query: str, query_trigrams: set, max_distance: int
+    ) -> List[Tuple[int, int, str]]:
+        """Ключи на расстоянии не больше max_distance от запроса, найденные через триграммы."""
+        needed = len(query_trigrams) - 3 * max_distance
+        # Подходящему ключу не хватает не больше 3 * max_distance триграмм запроса, значит из
+        # любых rare самых редких триграмм у него есть хотя бы rare - 3 * max_distance. Поэтому
+        # обходятся только короткие списки, а длинные (частые слова) проверяются у кандидатов.
+        postings = sorted((self.trigrams.get(trigram, ()) for trigram in query_trigrams), key=len)
+        rare = 3 * max_distance + 1
+        limit = max(len(postings[rare - 1]), len(self.keys) // 32)
+        while rare < len(postings) and len(postings[rare]) <= limit:
+            rare += 1
+        shared: Counter = Counter()
+        for posting in postings[:rare]:
+            shared.update(posting)
+        least = rare - 3 * max_distance
+        keys = self.keys
+        length = len(query)
+        ranked = []
+        for key_id, count in shared.items():
+            if count >= least and abs(len(keys[key_id]) - length) <= max_distance:
+                key = keys[key_id]
+                common = len(_trigrams(key) & query_trigrams)
+                if common >= needed:
+                    distance = _bounded_levenshtein(query, key, max_distance)
+                    if distance <= max_distance:
+                        ranked.append((distance, -common, key))
+        return ranked
+
+    def save(self, path: str) -> None:
+        """Функция сохранения песен и индексов в файл.
+
+        Args:
+            path (str): путь к файлу
+        """
+        state = (
+            [(song.artist, song.song_name, getattr(song, "tags", ())) for song in self.songs],
+            self.keys,
+            self._sorted_keys(),
+            self.postings,
+            self.trigrams,
+        )
+        with open(path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "SongSearch":
+        """Функция загрузки песен и индексов из файла, записанного методом save, без перестроения индексов.
+
+        Args:
+            path (str): путь к файлу
+
+        Returns:
+            SongSearch: загруженный поиск
+        """
+        with open(path, "rb") as file:
+            rows, keys, sorted_keys, postings, trigrams = pickle.load(file)
+        search = cls()
+        for artist, song_name, tags in rows:
+            song = Song(artist, song_name)
+            if tags:
+                song.add_tags(*tags)
+            search.songs.append(song)
+        search.keys = keys
+        search.sorted_keys = sorted_keys
+        search.postings = postings
+        search.trigrams = trigrams
+        for trigram in trigrams:
+            search.middles.setdefault(trigram[0] + trigram[2], set()).add(trigram[1])
+        return search
+
+    def _add_key(self, key: str) -> None:
+        """Добавление нового ключа в префиксный и триграммный индексы."""
+        key_id = len(self.keys)
+        self.keys.append(key)
+        self._unsorted_keys.append(key)
+        for trigram in _trigrams(key):
+            posting = self.trigrams.get(trigram)
+            if posting is None:
+                self.trigrams[trigram] = array("I", [key_id])
+                self.middles.setdefault(trigram[0] + trigram[2], set()).add(trigram[1])
+            else:
+                posting.append(key_id)
+
+    def _sorted_keys(self) -> List[str]:
+        """Отсортированный список ключей с учетом добавленных после последнего поиска."""
+        pending = self._unsorted_keys
+        if len(pending) <= 64:
+            for key in pending:
+                insort(self.sorted_keys, key)
+        else:
+            # Сортировка timsort уже упорядоченного списка с добавленным хвостом почти линейна.
+            self.sorted_keys.extend(pending)
+            self.sorted_keys.sort()
+        pending.clear()
+        return self.sorted_keys
+
+
+def _trigrams(text: str) -> set:
+    """Множество триграмм строки, дополненной пробелами по краям."""
+    text = f"  {text} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _bounded_levenshtein(first: str, second: str, limit: int) -> int:
+    """Расстояние Левенштейна, вычисление прекращается, как только оно превысит limit."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    if first == second:
+        return 0
+    if limit == 1:
+        return 1 if _one_edit_apart(first, second) else 2
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+        for j, second_char in enumerate(second, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (first_char != second_char))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _one_edit_variants(text: str, middles: Dict[str, set]) -> set:
+    """Строка и строки, получаемые из неё одной заменой, вставкой или удалением символа.
+
+    Новый символ между соседями a и b образует триграмму a?b, которая есть у ключа, только
+    если символ встречался между ними в каталоге, поэтому берутся лишь символы из middles[a + b].
+    Соседи берутся из строки, дополненной пробелами так же, как в _trigrams.
+    """
+    padded = f"  {text} "
+    variants = {text}
+    for i in range(len(text) + 1):
+        left, right = text[:i], text[i:]
+        before = padded[i + 1]
+        for char in middles.get(before + padded[i + 2], ()):
+            variants.add(left + char + right)
+        if right:
+            variants.add(left + right[1:])
+            for char in middles.get(before + padded[i + 3], ()):
+                variants.add(left + char + right[1:])
+    return variants
+
+
+def _one_edit_apart(first: str, second: str) -> bool:
+    """Проверка, что разные строки, длины которых отличаются не больше чем на 1,
+    различаются одной заменой, вставкой или удалением символа."""
+    if len(first) > len(second):
+        first, second = second, first
+    for index, (first_char, second_char) in enumerate(zip(first, second)):
+        if first_char != second_char:
+            break
+    else:
+        return True
+    if len(first) == len(second):
+        return first[index + 1 :] == second[index + 1 :]
+    return first[index:] == second[index + 1 :]
+
+
+def _tag_list(tags: Union[str, Sequence[str]]) -> Sequence[str]:
+    """Теги из JSON: одна строка превращается в список из одного тега."""
+    return [tags] if isinstance(tags, str) else tags
+
+
+def _insert(index: Dict[str, array], key: str, song_id: int) -> None:
+    """Добавление id в отсортированный список id по ключу."""
+    posting = index.get(key)
+    if posting is None:
+        index[key] = array("I", [song_id])
+    elif not posting or posting[-1] < song_id:
+        posting.append(song_id)
+    else:
+        insort(posting, song_id)
+
+
+def _discard(index: Dict[str, array], key: str, song_id: int) -> None:
+    """Удаление id из отсортированного списка id по ключу."""
+    posting = index.get(key)
+    if posting is None:
+        return
+    position = bisect_left(posting, song_id)
+    if position < len(posting) and posting[position] == song_id:
+        del posting[position]
+        if not posting:
+            del index[key]
 
 
 if __name__ == "__main__":
@@ -5,24 +5,144 @@
 [date] - 11.05.2024
 """
 
-from typing import List, Union
+import asyncio
+import threading
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Sequence, TextIO, Union
+
+try:
+    import numpy as np
+except ImportError:  # без numpy feed_bulk работает как обычный feed
+    np = None
+
+Sink = Callable[[Union[int, float]], object]
+
+
+class FileSink:
+    """Приемник сумм, записывающий их в файловый объект построчно пачками.
+
+    Суммы накапливаются и записываются одним вызовом write, как только их наберется batch_size.
+    """
+
+    def __init__(self, file: TextIO, batch_size: int = 1024) -> None:
+        self.file = file
+        self.batch_size = batch_size
+        self.pending: List[str] = []
+
+    def __call__(self, value: Union[int, float]) -> None:
+        self.pending.append(f"{value}\n")
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Функция записи накопленных сумм в файл."""
+        if self.pending:
+            self.file.write("".join(self.pending))
+            self.pending.clear()
+        self.file.flush()
 
 
 class Buffer:
-    def __init__(self) -> None:
+    # Минимальный размер пачки, начиная с которого feed_bulk считает суммы через numpy.
+    BULK_THRESHOLD = 4096
+
+    def __init__(self, sink: Optional[Sink] = None, size: int = 5) -> None:
+        """
+        Args:
+            sink (Optional[Sink]): приемник сумм пятерок - любая функция от одного аргумента,
+                например list.append, queue.Queue.put или FileSink. По умолчанию суммы выводятся в консоль.
+            size (int): размер группы, сумма которой выводится (по умолчанию 5).
+        """
+        if size < 1:
+            raise ValueError("Размер группы должен быть положительным")
         self.buffer = []
-    
+        self.sink = print if sink is None else sink
+        self.size = size
+
     def add(self, *args: Union[int, float]) -> None:
         """Функция для добавления новых элементов в буффер. 
 
-        Если число элементов в буффере превышает 4, то в консоль будет выведенна сумма пятерок (скоплений эллементов по 5 штук), 
-        до тех пор пока число элементов в буфере не будет меньше или равно 4.
+        Если число элементов в буффере превышает 4, то в консоль (или в приемник sink) будет выведенна сумма пятерок
+        (скоплений эллементов по 5 штук), до тех пор пока число элементов в буфере не будет меньше или равно 4.
+        """
+        self.feed(args)
+
+    def feed(self, values: Iterable[Union[int, float]]) -> None:
+        """Функция для добавления элементов из любого итерируемого объекта, в том числе генератора.
+
+        Элементы забираются лениво: буфер хранит не более size элементов и заполняется
+        по одной группе, поэтому время работы линейно, а дополнительная память не зависит
+        от числа элементов. Суммы групп передаются в приемник sink.
+
+        Args:
+            values (Iterable[Union[int, float]]): добавляемые элементы.
+        """
+        values = iter(values)
+        buffer = self.buffer
+        sink = self.sink
+        size = self.size
+        buffer.extend(islice(values, size - len(buffer)))
+        while len(buffer) == size:
+            sink(sum(buffer))
+            # Буфер очищается до чтения следующей группы: если итератор упадет посередине,
+            # в буфере останутся уже прочитанные элементы, а не отправленная группа.
+            buffer.clear()
+            buffer.extend(islice(values, size))
+
+    def feed_bulk(self, values: Sequence[Union[int, float]]) -> None:
+        """Функция для добавления большой пачки чисел с векторным подсчетом сумм через numpy.
+
+        Полные группы пачки переформировываются в матрицу (k, size) и суммируются по столбцам
+        в том же порядке сложений, что и sum(), а остаток переносится в буфер. Маленькие пачки,
+        смешанные int/float, числа вне диапазона int64 и отсутствие numpy обрабатываются
+        обычным feed, чтобы сохранить точную семантику целых чисел Python.
+
+        Args:
+            values (Sequence[Union[int, float]]): список или одномерный массив numpy с добавляемыми числами.
         """
-        self.buffer.extend(args)
-        while len(self.buffer) >= 5:
-            print(sum(self.buffer[0:5]))
-            del self.buffer[0:5]
-            
+        if np is None:
+            self.feed(values)
+            return
+        if isinstance(values, np.ndarray):
+            array = values
+        elif len(values) >= self.BULK_THRESHOLD and set(map(type, values)) in ({int}, {float}):
+            array = np.asarray(values)
+        else:
+            self.feed(values)
+            return
+        size = self.size
+        if array.ndim != 1 or array.dtype.kind not in "iuf" or len(array) < self.BULK_THRESHOLD:
+            self.feed(array.tolist())
+            return
+        if array.dtype.kind in "iu":
+            limit = np.iinfo(np.int64).max // size
+            if int(array.max()) > limit or int(array.min()) < -limit:
+                self.feed(array.tolist())
+                return
+            # Беззнаковые массивы нельзя складывать в накопитель int64 без приведения.
+            array = array.astype(np.int64, copy=False)
+            dtype = np.int64
+        else:
+            dtype = np.float64
+
+        if self.buffer:
+            # Сначала дополняется неполная группа в буфере; если пачки на это не хватает,
+            # считать векторно нечего.
+            need = size - len(self.buffer)
+            if len(array) < need:
+                self.feed(array.tolist())
+                return
+            self.feed(array[:need].tolist())
+            array = array[need:]
+        groups = len(array) // size
+        blocks = array[: groups * size].reshape(groups, size)
+        sums = np.zeros(groups, dtype=dtype)
+        for column in range(size):
+            sums += blocks[:, column]
+        sink = self.sink
+        for value in sums.tolist():
+            sink(value)
+        self.buffer.extend(array[groups * size :].tolist())
 
     def get_current_part(self) -> List[Union[int, float]]:
         """Функция для вывода на экран состояния буффера на данный момент.
@@ -33,6 +153,119 @@ class Buffer:
         return self.buffer
 
 
+class ConcurrentBuffer(Buffer):
+    """Буфер, в который одновременно могут добавлять элементы несколько потоков.
+
+    Каждый вызов add/feed/feed_bulk выполняется целиком под одной блокировкой, поэтому
+    элементы одного вызова не перемешиваются с элементами других потоков, ни одна группа
+    не теряется, а суммы попадают в приемник в порядке формирования групп. Порядок групп
+    общий для всех потоков, поэтому разбивать блокировку на части здесь нельзя.
+    """
+
+    def __init__(self, sink: Optional[Sink] = None, size: int = 5) -> None:
+        super().__init__(sink, size)
+        # RLock: feed_bulk вызывает feed, уже удерживая блокировку.
+        self.lock = threading.RLock()
+
+    def feed(self, values: Iterable[Union[int, float]]) -> None:
+        """Потокобезопасная версия Buffer.feed. Генератор вычисляется под блокировкой."""
+        with self.lock:
+            super().feed(values)
+
+    def feed_bulk(self, values: Sequence[Union[int, float]]) -> None:
+        """Потокобезопасная версия Buffer.feed_bulk."""
+        with self.lock:
+            super().feed_bulk(values)
+
+    def get_current_part(self) -> List[Union[int, float]]:
+        """Функция для получения копии состояния буфера на данный момент.
+
+        Returns:
+            List[int, float]: список, содержащий элементы содержащиеся в буфере
+        """
+        with self.lock:
+            return list(self.buffer)
+
+
+class AsyncBuffer:
+    """Буфер для корутин с асинхронным получением сумм групп.
+
+    Суммы складываются в ограниченную очередь: если потребители не успевают их забирать,
+    await add(...) ждет освобождения места в очереди. Полученные суммы можно перебирать
+    через async for до вызова close().
+    """
+
+    def __init__(self, size: int = 5, maxsize: int = 1024) -> None:
+        self.sums: asyncio.Queue = asyncio.Queue(maxsize)
+        self._pending: List[Union[int, float]] = []
+        self._buffer = Buffer(self._pending.append, size)
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+    async def add(self, *args: Union[int, float]) -> None:
+        """Функция для добавления новых элементов в буфер."""
+        await self.feed(args)
+
+    async def feed(self, values: Iterable[Union[int, float]]) -> None:
+        """Функция для добавления элементов из любого итерируемого объекта.
+
+        Элементы обрабатываются частями, после каждой части суммы отправляются в очередь,
+        поэтому число неотправленных сумм ограничено.
+
+        Args:
+            values (Iterable[Union[int, float]]): добавляемые элементы.
+        """
+        values = iter(values)
+        chunk_size = self._buffer.size * self.sums.maxsize if self.sums.maxsize > 0 else 4096
+        async with self._lock:
+            # Проверка под блокировкой: feed, ожидавший блокировку во время close(),
+            # не должен отправлять суммы после завершающего None.
+            if self._closed:
+                raise RuntimeError("Буфер закрыт")
+            while True:
+                chunk = list(islice(values, chunk_size))
+                if not chunk:
+                    break
+                self._buffer.feed(chunk)
+                for value in self._pending:
+                    await self.sums.put(value)
+                self._pending.clear()
+
+    def get_current_part(self) -> List[Union[int, float]]:
+        """Функция для получения копии состояния буфера на данный момент.
+
+        Returns:
+            List[int, float]: список, содержащий элементы содержащиеся в буфере
+        """
+        return list(self._buffer.buffer)
+
+    async def close(self) -> None:
+        """Функция завершения работы буфера: после неё перебор сумм заканчивается.
+
+        close дожидается завершения уже начатых вызовов feed, но не ждет потребителей:
+        если очередь сумм заполнена, завершающий None не отправляется, и перебор
+        заканчивается, когда оставшиеся в очереди суммы будут прочитаны.
+        """
+        async with self._lock:
+            self._closed = True
+            try:
+                self.sums.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    async def __aiter__(self) -> AsyncIterator[Union[int, float]]:
+        while True:
+            # Ожидающего get при заполненной очереди быть не может, поэтому None нужен только
+            # для пробуждения потребителей, ждущих пустую очередь.
+            if self._closed and self.sums.empty():
+                return
+            value = await self.sums.get()
+            if value is None:
+                self.sums.put_nowait(None)
+                return
+            yield value
+
+
 if __name__ == "__main__":
     buf = Buffer()
     buf.add(1, 2.0, 3)
@@ -5,20 +5,168 @@
 [date] - 11.05.2024
 """
 
-from typing import Dict, List
+import os
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
-def add_to_inventory(inventory: dict, added_items: List[str]) -> Dict[str, int]:
-    for item in added_items:
-        if item in inventory.keys():
-            inventory[item] += 1
-        else:
-            inventory[item] = 1
-    
+def add_to_inventory(inventory: dict, added_items: Iterable[str]) -> Dict[str, int]:
+    """Функция добавления вещей в инвентарь.
+
+    Вещи подсчитываются средствами collections.Counter (подсчет выполняется на C),
+    после чего количества добавляются в инвентарь. Новые вещи попадают в инвентарь
+    в порядке их первого появления, как и при добавлении по одной.
+
+    Args:
+        inventory (dict): инвентарь, изменяемый на месте.
+        added_items (Iterable[str]): добавляемые вещи - список или любой итерируемый объект, в том числе генератор.
+
+    Returns:
+        Dict[str, int]: тот же самый инвентарь inventory.
+    """
+    return _merge_counts(inventory, Counter(added_items))
+
+
+def add_to_inventory_parallel(
+    inventory: dict,
+    added_items: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 1_000_000,
+) -> Dict[str, int]:
+    """Функция добавления в инвентарь очень большого потока вещей с подсчетом в нескольких процессах.
+
+    Поток разбивается на части по chunk_size вещей, каждая часть подсчитывается в отдельном
+    процессе, а частичные количества суммируются в инвентаре. Порядок новых вещей в инвентаре
+    совпадает с порядком их первого появления в потоке.
+
+    Args:
+        inventory (dict): инвентарь, изменяемый на месте.
+        added_items (Iterable[str]): добавляемые вещи - список или любой итерируемый объект, в том числе генератор.
+        workers (Optional[int]): число процессов, по умолчанию - число ядер процессора.
+        chunk_size (int): число вещей в одной части.
+
+    Returns:
+        Dict[str, int]: тот же самый инвентарь inventory.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Одновременно в обработке не больше двух частей на процесс, чтобы не читать весь поток в память.
+        in_flight = deque()
+        for chunk in _chunks(added_items, chunk_size):
+            if len(in_flight) >= 2 * workers:
+                _merge_counts(inventory, in_flight.popleft().result())
+            in_flight.append(executor.submit(Counter, chunk))
+        while in_flight:
+            _merge_counts(inventory, in_flight.popleft().result())
     return inventory
 
+
+def _chunks(items: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    """Разбиение потока вещей на списки длиной не более chunk_size."""
+    items = iter(items)
+    while chunk := list(islice(items, chunk_size)):
+        yield chunk
+
+
+def _merge_counts(inventory: dict, counts: Counter) -> Dict[str, int]:
+    """Добавление подсчитанных количеств вещей в инвентарь."""
+    for item, count in counts.items():
+        inventory[item] = inventory.get(item, 0) + count
+    return inventory
+
+
+class ItemRegistry:
+    """Реестр имен вещей, сопоставляющий каждому имени небольшой целочисленный id.
+
+    Одно имя хранится в реестре один раз, а инвентари хранят только id.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        """Функция получения id имени, новое имя регистрируется.
+
+        Args:
+            name (str): имя вещи.
+
+        Returns:
+            int: id имени в реестре.
+        """
+        item_id = self.ids.get(name)
+        if item_id is None:
+            item_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return item_id
+
+    def name(self, item_id: int) -> str:
+        """Функция получения имени вещи по её id."""
+        return self.names[item_id]
+
+
+class CompactInventory:
+    """Инвентарь, хранящий пары id из ItemRegistry -> количество в двух массивах array.
+
+    Массивы ids и counts упорядочены по id, поэтому количество вещи ищется двоичным
+    поиском. Вместо словаря со строковыми ключами на каждый инвентарь приходится два
+    непрерывных массива по числу разных вещей в нем (а не по размеру общего реестра),
+    а имена вещей восстанавливаются из реестра только при отображении.
+    """
+
+    def __init__(self, registry: ItemRegistry) -> None:
+        self.registry = registry
+        self.ids = array("L")
+        self.counts = array("L")
+
+    def add(self, added_items: Iterable[str]) -> "CompactInventory":
+        """Функция добавления вещей в инвентарь, аналог add_to_inventory.
+
+        Args:
+            added_items (Iterable[str]): добавляемые вещи - список или любой итерируемый объект.
+
+        Returns:
+            CompactInventory: тот же самый инвентарь.
+        """
+        intern = self.registry.intern
+        merged = dict(zip(self.ids, self.counts))
+        for name, count in Counter(added_items).items():
+            item_id = intern(name)
+            merged[item_id] = merged.get(item_id, 0) + count
+        ids = sorted(merged)
+        self.ids = array("L", ids)
+        self.counts = array("L", [merged[item_id] for item_id in ids])
+        return self
+
+    def __getitem__(self, name: str) -> int:
+        item_id = self.registry.ids.get(name)
+        if item_id is None:
+            return 0
+        position = bisect_left(self.ids, item_id)
+        if position == len(self.ids) or self.ids[position] != item_id:
+            return 0
+        return self.counts[position]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Функция перебора вещей инвентаря с их количествами, имена восстанавливаются по ходу перебора."""
+        name = self.registry.name
+        for item_id, count in zip(self.ids, self.counts):
+            yield name(item_id), count
+
+    def to_dict(self) -> Dict[str, int]:
+        """Функция преобразования инвентаря в обычный словарь, как у add_to_inventory."""
+        return dict(self.items())
+
+
 if __name__ == "__main__":
     inv = {'qq': 1, 'no qq':2}
     cool_loot = ['qq', 'no qq', 'no qq', 'qwer']
     inv = add_to_inventory(inv, cool_loot)
-    print(inv)
\ No newline at end of file
+    print(inv)
@@ -5,15 +5,56 @@
 [date] - 11.05.2024
 """
 
+import asyncio
+import contextlib
+import copy
+import cProfile
+import functools
+import io
+import json
+import mmap
+import os
 import random
+import struct
+import sys
+import threading
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict, List, Literal, Self
-
-
-@dataclass
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Self,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для resolve_duels
+    np = None
+
+
+@dataclass(slots=True)
 class Item:
-    """Датакласс вещи"""
+    """Датакласс вещи
+
+    Характеристики вещи, которая может быть надета, меняются через Character.update_item:
+    персонаж хранит суммы характеристик надетых вещей и сам их не пересчитывает.
+    """
 
     id: int
     name: str
@@ -22,7 +63,7 @@ class Item:
     defense: int = 0
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Drink:
     """Датакласс напитка"""
 
@@ -34,12 +75,102 @@ class Drink:
     price: int
 
 
-class Inventory:
-    """Класс представляющий из себя инвентарь персонажа"""
+class ItemTable:
+    """Хранилище большого числа вещей в виде отдельных массивов характеристик.
+
+    Вместо объекта Item на каждую вещь хранятся столбцы id, health, attack и defense в
+    массивах array и столбец имен. Объекты Item создаются только при обращении по индексу.
+    """
+
+    def __init__(self: Self, items: Iterable[Item] = ()) -> None:
+        self.ids = array("q")
+        self.names: List[str] = []
+        self.health = array("q")
+        self.attack = array("q")
+        self.defense = array("q")
+        self.extend(items)
+
+    def __len__(self: Self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self: Self, index: int) -> Item:
+        return Item(
+            self.ids[index],
+            self.names[index],
+            self.health[index],
+            self.attack[index],
+            self.defense[index],
+        )
+
+    def append(self: Self, item: Item) -> None:
+        """Функция для добавления вещи в хранилище
+
+        Args:
+            item (Item): добавляемая вещь
+        """
+        self.ids.append(item.id)
+        # Одинаковые имена у миллионов вещей хранятся одной строкой.
+        self.names.append(sys.intern(item.name))
+        self.health.append(item.health)
+        self.attack.append(item.attack)
+        self.defense.append(item.defense)
+
+    def extend(self: Self, items: Iterable[Item]) -> None:
+        """Функция для добавления нескольких вещей в хранилище
+
+        Args:
+            items (Iterable[Item]): добавляемые вещи
+        """
+        for item in items:
+            self.append(item)
+
+
+class ItemsView(Sequence[Item]):
+    """Вещи набора ItemCollection только для чтения, без копирования списка."""
+
+    __slots__ = ("_items",)
+
+    def __init__(self: Self, items: List[Item]) -> None:
+        self._items = items
+
+    def __len__(self: Self) -> int:
+        return len(self._items)
+
+    def __getitem__(self: Self, index: int) -> Item:
+        return self._items[index]
+
+    def __iter__(self: Self) -> Iterator[Item]:
+        return iter(self._items)
+
+    def __repr__(self: Self) -> str:
+        return f"ItemsView({self._items!r})"
+
+
+class ItemCollection:
+    """Набор вещей с индексом по id.
+
+    Помимо списка вещей хранится словарь id -> позиции вещей с этим id в списке
+    (id могут повторяться; позиции хранятся в словаре как в упорядоченном множестве),
+    поэтому поиск и удаление вещи по id выполняются за O(1) при любом числе одинаковых id:
+    удаляемая вещь заменяется последней вещью списка. Из-за этого порядок вещей
+    после удаления может меняться. Вещи доступны через items только для чтения,
+    изменяется набор методами add_item и take_item.
+    """
 
     def __init__(self: Self) -> None:
-        self.items: List[Item] = []
-        self.money: int = 100  # Начальное количество денег
+        self._items: List[Item] = []
+        self._positions: Dict[int, Dict[int, None]] = {}
+
+    def __len__(self: Self) -> int:
+        return len(self._items)
+
+    def __iter__(self: Self) -> Iterator[Item]:
+        return iter(self._items)
+
+    @property
+    def items(self: Self) -> ItemsView:
+        """Вещи набора только для чтения."""
+        return ItemsView(self._items)
 
     def add_item(self: Self, item: Item) -> None:
         """Функция для добавления новых вещей в инвентарь
@@ -47,7 +178,78 @@ class Inventory:
         Args:
             item (Item): добавляемая вещь
         """
-        self.items.append(item)
+        self._positions.setdefault(item.id, {})[len(self._items)] = None
+        self._items.append(item)
+
+    def take_item(self: Self, item_id: int) -> Optional[Item]:
+        """Функция для извлечения вещи по её id.
+
+        Args:
+            item_id (int): id вещи
+
+        Returns:
+            Optional[Item]: извлеченная вещь или None, если вещи с таким id нет.
+        """
+        positions = self._positions.get(item_id)
+        if not positions:
+            return None
+        index, _ = positions.popitem()
+        if not positions:
+            del self._positions[item_id]
+        items = self._items
+        item = items[index]
+        last = items.pop()
+        if index < len(items):
+            items[index] = last
+            moved = self._positions[last.id]
+            del moved[len(items)]
+            moved[index] = None
+        return item
+
+    def get_item(self: Self, item_id: int) -> Optional[Item]:
+        """Функция получения вещи по её id без извлечения.
+
+        Args:
+            item_id (int): id вещи
+
+        Returns:
+            Optional[Item]: вещь, которую извлек бы take_item, или None, если вещи с таким id нет.
+        """
+        positions = self._positions.get(item_id)
+        if not positions:
+            return None
+        return self._items[next(reversed(positions))]
+
+    def take_items(self: Self, item_ids: Iterable[int]) -> List[Item]:
+        """Функция для извлечения нескольких вещей по их id, отсутствующие id пропускаются.
+
+        Args:
+            item_ids (Iterable[int]): id вещей
+
+        Returns:
+            List[Item]: извлеченные вещи.
+        """
+        taken = []
+        for item_id in item_ids:
+            item = self.take_item(item_id)
+            if item is not None:
+                taken.append(item)
+        return taken
+
+
+class Inventory(ItemCollection):
+    """Класс представляющий из себя инвентарь персонажа
+
+    В отличие от task5_1.CompactInventory, здесь хранятся сами вещи, а не количества по id:
+    вещи с одним id могут различаться характеристиками (generate_random_item), их можно
+    надеть и изменить на месте, поэтому свести их к счетчикам нельзя. Память экономится
+    за счет слотов Item и общего экземпляра строки имени: имена интернируются там, где вещи
+    приходят из внешних данных (LootTable.reload, Snapshot, ItemTable.append).
+    """
+
+    def __init__(self: Self) -> None:
+        super().__init__()
+        self.money: int = 100  # Начальное количество денег
 
     def add_money(self: Self, amount: int) -> None:
         """Функция для добавления денег в кошелек
@@ -78,12 +280,25 @@ class Inventory:
             Dict[str, int]: словарь, содержащий в себе информацию о вещах из инвентаря.
         """
         summary = {}
-        for item in self.items:
+        for item in self._items:
             summary[item.name] = (item.health, item.attack, item.defense)
         return summary
 
 
 class Character:
+    __slots__ = (
+        "name",
+        "inventory",
+        "base_health",
+        "base_attack",
+        "base_defense",
+        "equipment",
+        "_health",
+        "_bonus_health",
+        "_bonus_attack",
+        "_bonus_defense",
+    )
+
     def __init__(
         self: Self, name: str, base_health: int, base_attack: int, base_defense: int
     ) -> None:
@@ -92,8 +307,17 @@ class Character:
         self.base_health = base_health
         self.base_attack = base_attack
         self.base_defense = base_defense
-        self.equipped_items: List[Item] = []
+        self.equipment = ItemCollection()
         self._health = base_health
+        # Суммарные характеристики надетых вещей, обновляются при надевании и снятии вещей.
+        self._bonus_health = 0
+        self._bonus_attack = 0
+        self._bonus_defense = 0
+
+    @property
+    def equipped_items(self: Self) -> ItemsView:
+        """Надетые вещи только для чтения: надевать и снимать вещи нужно методами equip_item и unequip_item."""
+        return self.equipment.items
 
     def equip_item(self: Self, item_id: int) -> None:
         """Функция, для того, чтобы надеть вещи на себя
@@ -101,12 +325,13 @@ class Character:
         Args:
             item_id (int): id вещи из инвентаря
         """
-        for i, item in enumerate(self.inventory.items):
-            if item.id == item_id:
-                self.equipped_items.append(item)
-                self.inventory.items.pop(i)
-                print(f"Вы надели: {item.name}")
-        print("Такой вещи нет в инвентаре.")
+        item = self.inventory.take_item(item_id)
+        if item is None:
+            print("Такой вещи нет в инвентаре.")
+            return
+        self.equipment.add_item(item)
+        self._add_bonus(item, 1)
+        print(f"Вы надели: {item.name}")
 
     def unequip_item(self: Self, item_id: int) -> None:
         """Функция, чтобы выкинуть вещь из инвентаря.
@@ -114,17 +339,97 @@ class Character:
         Args:
             item_id (int): id вещи из инвентаря
         """
-        for i, item in enumerate(self.equipped_items):
-            if item.id == item_id:
-                self.inventory.items.append(item)
-                self.equipped_items.pop(i)
-                print(f"Вы выкинули: {item.name}")
-        print("Такой вещи нет на вас.")
+        item = self.equipment.take_item(item_id)
+        if item is None:
+            print("Такой вещи нет на вас.")
+            return
+        self.inventory.add_item(item)
+        self._add_bonus(item, -1)
+        print(f"Вы выкинули: {item.name}")
+
+    def equip_items(self: Self, item_ids: Iterable[int]) -> List[Item]:
+        """Функция, чтобы надеть сразу несколько вещей без вывода сообщений.
+
+        Args:
+            item_ids (Iterable[int]): id вещей из инвентаря, отсутствующие id пропускаются
+
+        Returns:
+            List[Item]: надетые вещи
+        """
+        items = self.inventory.take_items(item_ids)
+        for item in items:
+            self.equipment.add_item(item)
+            self._add_bonus(item, 1)
+        return items
+
+    def unequip_items(self: Self, item_ids: Iterable[int]) -> List[Item]:
+        """Функция, чтобы снять сразу несколько вещей без вывода сообщений.
+
+        Args:
+            item_ids (Iterable[int]): id надетых вещей, отсутствующие id пропускаются
+
+        Returns:
+            List[Item]: снятые вещи
+        """
+        items = self.equipment.take_items(item_ids)
+        for item in items:
+            self.inventory.add_item(item)
+            self._add_bonus(item, -1)
+        return items
+
+    def _add_bonus(self: Self, item: Item, sign: int) -> None:
+        """Учет характеристик надетой (sign=1) или снятой (sign=-1) вещи в суммарных бонусах."""
+        self._bonus_health += sign * item.health
+        self._bonus_attack += sign * item.attack
+        self._bonus_defense += sign * item.defense
+
+    def update_item(self: Self, item_id: int, **stats: int) -> Optional[Item]:
+        """Функция изменения характеристик вещи персонажа на месте.
+
+        Вещь ищется сначала среди надетых, затем в инвентаре. Для надетой вещи бонусы
+        персонажа пересчитываются на разницу старых и новых характеристик.
+
+        Args:
+            item_id (int): id вещи
+            **stats (int): новые значения health, attack и defense
+
+        Raises:
+            ValueError: ошибка вызываемая, если передана другая характеристика
+
+        Returns:
+            Optional[Item]: измененная вещь или None, если у персонажа нет вещи с таким id
+        """
+        unknown = stats.keys() - {"health", "attack", "defense"}
+        if unknown:
+            raise ValueError(f"Неизвестные характеристики вещи: {', '.join(sorted(unknown))}")
+        item = self.equipment.get_item(item_id)
+        equipped = item is not None
+        if not equipped:
+            item = self.inventory.get_item(item_id)
+            if item is None:
+                return None
+        if equipped:
+            self._add_bonus(item, -1)
+        for name, value in stats.items():
+            setattr(item, name, value)
+        if equipped:
+            self._add_bonus(item, 1)
+        return item
+
+    def refresh_stats(self: Self) -> None:
+        """Функция полного пересчета бонусов от надетых вещей.
+
+        Нужна, если надетые вещи были изменены в обход update_item, например при
+        восстановлении персонажа из сохранения.
+        """
+        self._bonus_health = sum(item.health for item in self.equipped_items)
+        self._bonus_attack = sum(item.attack for item in self.equipped_items)
+        self._bonus_defense = sum(item.defense for item in self.equipped_items)
 
     @property
     def health(self: Self) -> int:
         """Геттер здоровья."""
-        return self._health + sum(item.health for item in self.equipped_items)
+        return self._health + self._bonus_health
 
     @health.setter
     def health(self: Self, value: int) -> None:
@@ -134,17 +439,21 @@ class Character:
     @property
     def attack(self: Self) -> int:
         """Геттер здлоровья."""
-        return self.base_attack + sum(item.attack for item in self.equipped_items)
+        return self.base_attack + self._bonus_attack
 
     @property
     def defense(self: Self) -> int:
         """Сеттер здоровья."""
-        return self.base_defense + sum(item.defense for item in self.equipped_items)
+        return self.base_defense + self._bonus_defense
 
 
 class Mob(ABC):
     """Абстрактный класс, для дальнейшей генерации различных мобов."""
 
+    # Goblin и Orc не объявляют __slots__: их метод attack перекрывает слот,
+    # поэтому значение атаки у них по-прежнему хранится в __dict__ экземпляра.
+    __slots__ = ("name", "health", "attack", "defense")
+
     def __init__(self: Self, name: str, health: int, attack: int, defense: int) -> None:
         self.name = name
         self.health = health
@@ -162,53 +471,399 @@ class Orc(Mob):
         print(f"Орк атакует {character.name}!")
 
 
-def generate_random_item() -> Item:
+class GameRandom(random.Random):
+    """Генератор случайных чисел игры с запоминаемым зерном.
+
+    Каждая игра или процесс получает свой генератор, поэтому генерация не зависит от
+    глобального модуля random и может выполняться параллельно. Зерно сохраняется в
+    initial_seed: генератор, созданный с тем же зерном, повторит всю последовательность
+    случайных событий. Независимые дочерние потоки создаются методом spawn.
+    """
+
+    def __init__(self: Self, seed: Optional[Union[int, str]] = None, use_numpy: bool = False) -> None:
+        """
+        Args:
+            seed (Optional[Union[int, str]]): зерно, по умолчанию выбирается случайно и сохраняется
+            use_numpy (bool): использовать numpy.random.Generator для пачек чисел
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.initial_seed = seed
+        self.use_numpy = use_numpy
+        self._numpy = None
+        super().__init__(seed)
+
+    def spawn(self: Self, key: Union[int, str]) -> "GameRandom":
+        """Функция создания независимого дочернего генератора.
+
+        Зерно дочернего генератора зависит только от зерна родителя и ключа,
+        а не от того, сколько чисел родитель уже выдал.
+
+        Args:
+            key (Union[int, str]): ключ потока, например номер игры или процесса
+
+        Returns:
+            GameRandom: дочерний генератор
+        """
+        return GameRandom(f"{self.initial_seed}/{key}", self.use_numpy)
+
+    def __reduce__(self: Self) -> tuple:
+        # random.Random пересоздает генератор через cls() без аргументов, и копия
+        # получала бы новое случайное initial_seed; здесь зерно и настройки сохраняются.
+        numpy_state = None if self._numpy is None else self._numpy.bit_generator.state
+        return self.__class__, (self.initial_seed, self.use_numpy), (self.getstate(), numpy_state)
+
+    def __setstate__(self: Self, state: tuple) -> None:
+        random_state, numpy_state = state
+        self.setstate(random_state)
+        if numpy_state is not None:
+            self._numpy = np.random.default_rng()
+            self._numpy.bit_generator.state = numpy_state
+
+    def randoms(self: Self, n: int) -> List[float]:
+        """Функция получения пачки из n случайных чисел из [0, 1)."""
+        if self.use_numpy:
+            return self._generator().random(n).tolist()
+        return [self.random() for _ in range(n)]
+
+    def randints(self: Self, a: int, b: int, n: int) -> List[int]:
+        """Функция получения пачки из n случайных целых чисел из [a, b]."""
+        if self.use_numpy:
+            return self._generator().integers(a, b, n, endpoint=True).tolist()
+        return [self.randint(a, b) for _ in range(n)]
+
+    def _generator(self: Self) -> "np.random.Generator":
+        """Генератор numpy, зерно которого берется из этого генератора."""
+        if self._numpy is None:
+            if np is None:
+                raise ImportError("Для use_numpy=True необходим numpy")
+            self._numpy = np.random.default_rng(self.getrandbits(128))
+        return self._numpy
+
+
+class AliasTable:
+    """Таблица взвешенного случайного выбора по методу псевдонимов (алгоритм Воуза).
+
+    Таблица строится один раз за O(n), после чего каждый выбор занимает O(1) независимо
+    от числа записей: одно случайное число выбирает ячейку и решает, взять ли её запись
+    или запись-псевдоним этой ячейки.
+    """
+
+    def __init__(self: Self, entries: Sequence, weights: Sequence[float]) -> None:
+        """
+        Args:
+            entries (Sequence): записи таблицы
+            weights (Sequence[float]): неотрицательные веса записей
+
+        Raises:
+            ValueError: ошибка вызываемая, если таблица пуста, веса не соответствуют записям или их сумма не положительна
+        """
+        if not entries or len(entries) != len(weights):
+            raise ValueError("Нужно по одному весу на каждую запись таблицы")
+        total = sum(weights)
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("Веса должны быть неотрицательными с положительной суммой")
+        size = len(entries)
+        scaled = [weight * size / total for weight in weights]
+        self.entries = list(entries)
+        self.weights = list(weights)
+        self.prob = array("d", [1.0]) * size
+        self.alias = array("I", range(size))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Оставшиеся ячейки из-за погрешности округления заполнены почти целиком, prob у них 1.
+        self._numpy_tables = None
+
+    def __len__(self: Self) -> int:
+        return len(self.entries)
+
+    def draw(self: Self, rng: random.Random = random) -> object:
+        """Функция выбора одной записи с учетом весов.
+
+        Args:
+            rng (random.Random): генератор случайных чисел, по умолчанию - модуль random
+
+        Returns:
+            object: выбранная запись
+        """
+        point = rng.random() * len(self.prob)
+        index = int(point)
+        return self.entries[index if point - index < self.prob[index] else self.alias[index]]
+
+    def draw_many(self: Self, n: int, rng: random.Random = random) -> List:
+        """Функция выбора n записей с возвращением за один вызов.
+
+        У GameRandom с use_numpy=True выбор выполняется целиком в numpy.
+
+        Args:
+            n (int): число записей
+            rng (random.Random): генератор случайных чисел, по умолчанию - модуль random
+
+        Returns:
+            List: выбранные записи
+        """
+        entries = self.entries
+        size = len(self.prob)
+        if isinstance(rng, GameRandom) and rng.use_numpy:
+            if self._numpy_tables is None:
+                self._numpy_tables = (np.frombuffer(self.prob, dtype=np.float64), np.array(self.alias, dtype=np.intp))
+            prob, alias = self._numpy_tables
+            points = rng._generator().random(n) * size
+            indices = points.astype(np.intp)
+            picked = np.where(points - indices < prob[indices], indices, alias[indices])
+            return [entries[index] for index in picked.tolist()]
+        prob, alias = self.prob, self.alias
+        uniform = rng.random
+        picked = []
+        for _ in range(n):
+            point = uniform() * size
+            index = int(point)
+            picked.append(entries[index if point - index < prob[index] else alias[index]])
+        return picked
+
+
+_MOB_TYPES: Dict[str, Type[Mob]] = {"Mob": Mob, "Goblin": Goblin, "Orc": Orc}
+
+
+class LootTable:
+    """Таблица выпадения вещей или мобов с весами редкости, описанная в JSON-файле.
+
+    Файл - список объектов с полем weight и полями вещи (id, name, health, attack, defense)
+    либо моба (name, health, attack, defense и необязательный type: "Goblin" или "Orc").
+    Выданные вещи и мобы - копии записей таблицы, их можно изменять. Файл
+    перечитывается при изменении, проверка выполняется не чаще раза в check_interval секунд.
+    """
+
+    def __init__(self: Self, path: str, kind: Literal["item", "mob"] = "item", check_interval: float = 1.0) -> None:
+        """
+        Args:
+            path (str): путь к JSON-файлу таблицы
+            kind (Literal["item", "mob"]): вид записей таблицы
+            check_interval (float): наименьший промежуток между проверками изменения файла в секундах
+        """
+        self.path = path
+        self.kind = kind
+        self.check_interval = check_interval
+        self._mtime = None
+        self._checked = time.monotonic()
+        self.reload()
+
+    def __len__(self: Self) -> int:
+        return len(self.table)
+
+    def reload(self: Self) -> None:
+        """Функция перечитывания таблицы из файла и перестроения таблицы псевдонимов."""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as file:
+            records = json.load(file)
+        weights = [record.pop("weight", 1) for record in records]
+        for record in records:
+            if isinstance(record.get("name"), str):
+                record["name"] = sys.intern(record["name"])
+        if self.kind == "item":
+            entries = [Item(**record) for record in records]
+        else:
+            entries = [_MOB_TYPES[record.pop("type", "Mob")](**record) for record in records]
+        self.table = AliasTable(entries, weights)
+        self._mtime = mtime
+
+    def reload_if_changed(self: Self) -> bool:
+        """Функция перечитывания таблицы, если файл изменился с последней загрузки.
+
+        Returns:
+            bool: таблица была перечитана
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            if os.stat(self.path).st_mtime_ns == self._mtime:
+                return False
+            self.reload()
+        except (OSError, ValueError, TypeError, KeyError):
+            # Файл удален или записан не до конца: остается прежняя таблица, проверка повторится позже.
+            return False
+        return True
+
+    def draw(self: Self, rng: random.Random = random) -> Union[Item, Mob]:
+        """Функция выбора одной вещи или моба с учетом весов."""
+        self.reload_if_changed()
+        entry = self.table.draw(rng)
+        return copy.copy(entry)
+
+    def draw_many(self: Self, n: int, rng: random.Random = random) -> List[Union[Item, Mob]]:
+        """Функция выбора n вещей или мобов с учетом весов за один вызов."""
+        self.reload_if_changed()
+        entries = self.table.draw_many(n, rng)
+        return [copy.copy(entry) for entry in entries]
+
+
+def generate_random_item(rng: random.Random = random, table: Optional[LootTable] = None) -> Item:
     """Функция для генерации предмета со случайными характеристиками
 
+    Args:
+        rng (random.Random): генератор случайных чисел, по умолчанию - модуль random
+        table (Optional[LootTable]): таблица выпадения вещей, по умолчанию вещь собирается случайно
+
     Returns:
         Item: сгенерированная вещь
     """
-    item_names = ["Зелье здоровья", "Меч", "Щит", "Шлем", "Броня"]
-    name = random.choice(item_names)
-    health = random.randint(0, 10)
-    attack = random.randint(0, 5)
-    defense = random.randint(0, 5)
-    return Item(name, health, attack, defense)
+    if table is not None:
+        return table.draw(rng)
+    item_names = [(10, "Зелье здоровья"), (11, "Меч"), (12, "Щит"), (13, "Шлем"), (14, "Броня")]
+    item_id, name = rng.choice(item_names)
+    health = rng.randint(0, 10)
+    attack = rng.randint(0, 5)
+    defense = rng.randint(0, 5)
+    return Item(item_id, name, health, attack, defense)
 
 
-def generate_random_mob() -> Mob:
+def generate_random_mob(rng: random.Random = random, table: Optional[LootTable] = None) -> Mob:
     """Функция генерации случайных мобов.
 
+    Args:
+        rng (random.Random): генератор случайных чисел, по умолчанию - модуль random
+        table (Optional[LootTable]): таблица мобов, по умолчанию моб собирается случайно
+
     Returns:
         Mob: определенный моб со случайными характеристиками.
     """
+    if table is not None:
+        return table.draw(rng)
     mob_names = ["Гоблин", "Орк"]
-    name = random.choice(mob_names)
-    health = random.randint(20, 50)
-    attack = random.randint(5, 10)
-    defense = random.randint(2, 5)
+    name = rng.choice(mob_names)
+    health = rng.randint(20, 50)
+    attack = rng.randint(5, 10)
+    defense = rng.randint(2, 5)
     if name == "Гоблин":
         return Goblin(name, health, attack, defense)
     else:
         return Orc(name, health, attack, defense)
 
 
-def fight(character: Character, mob: Mob) -> None:
+class FightResult(NamedTuple):
+    """Итог боя: победитель ("character", "mob" или None, если бой не начался),
+    число раундов и оставшееся здоровье персонажа и моба."""
+
+    winner: Optional[Literal["character", "mob"]]
+    rounds: int
+    character_health: int
+    mob_health: int
+
+
+def resolve_duel(
+    health: int, attack: int, health_bonus: int, mob_health: int, mob_attack: int
+) -> FightResult:
+    """Функция вычисления итога боя за O(1), без пошаговой симуляции.
+
+    Повторяет поведение пошагового боя: персонаж бьет первым, защита не учитывается,
+    а сеттер здоровья персонажа после каждого удара моба снова прибавляет бонус здоровья
+    от вещей, поэтому за раунд персонаж теряет mob_attack - health_bonus здоровья.
+
+    Args:
+        health (int): текущее здоровье персонажа (с учетом вещей)
+        attack (int): атака персонажа
+        health_bonus (int): бонус здоровья от надетых вещей
+        mob_health (int): здоровье моба
+        mob_attack (int): атака моба
+
+    Raises:
+        ValueError: ошибка вызываемая, если бой никогда не закончится
+
+    Returns:
+        FightResult: итог боя
+    """
+    if health <= 0 or mob_health <= 0:
+        return FightResult(None, 0, health, mob_health)
+    loss = mob_attack - health_bonus
+    character_rounds = -(-mob_health // attack) if attack > 0 else None
+    mob_rounds = -(-health // loss) if loss > 0 else None
+    if character_rounds is None and mob_rounds is None:
+        raise ValueError("Бой никогда не закончится")
+    if mob_rounds is None or (character_rounds is not None and character_rounds <= mob_rounds):
+        rounds = character_rounds
+        return FightResult("character", rounds, health - (rounds - 1) * loss, mob_health - rounds * attack)
+    rounds = mob_rounds
+    return FightResult("mob", rounds, health - rounds * loss, mob_health - rounds * attack)
+
+
+def resolve_fight(character: Character, mob: Mob) -> FightResult:
+    """Функция проведения боя без вывода в консоль.
+
+    Здоровье персонажа и моба изменяется так же, как при пошаговом бое.
+
+    Args:
+        character (Character): объект персонажа, нашего игрока
+        mob (Mob): объект моба, которые встречаются в данжах
+
+    Returns:
+        FightResult: итог боя
+    """
+    result = resolve_duel(
+        character.health, character.attack, character._bonus_health, mob.health, mob.attack
+    )
+    # Сеттер health не прибавляет бонус вещей, поэтому здоровье записывается без него.
+    character._health = result.character_health - character._bonus_health
+    mob.health = result.mob_health
+    return result
+
+
+def resolve_duels(health, attack, health_bonus, mob_health, mob_attack) -> FightResult:
+    """Функция вычисления итогов множества боев сразу с помощью numpy.
+
+    Аргументы - массивы одинаковой длины с теми же значениями, что и у resolve_duel.
+    Поле winner результата - массив: 1 - победил персонаж, -1 - победил моб, 0 - бой не начался.
+
+    Raises:
+        ImportError: ошибка вызываемая, если numpy не установлен
+        ValueError: ошибка вызываемая, если хотя бы один бой никогда не закончится
+
+    Returns:
+        FightResult: итоги боев в виде массивов
+    """
+    if np is None:
+        raise ImportError("Для resolve_duels необходим numpy")
+    health, attack, health_bonus, mob_health, mob_attack = (
+        np.asarray(values, dtype=np.int64)
+        for values in (health, attack, health_bonus, mob_health, mob_attack)
+    )
+    never = np.iinfo(np.int64).max
+    loss = mob_attack - health_bonus
+    character_rounds = np.where(attack > 0, -(-mob_health // np.where(attack > 0, attack, 1)), never)
+    mob_rounds = np.where(loss > 0, -(-health // np.where(loss > 0, loss, 1)), never)
+    started = (health > 0) & (mob_health > 0)
+    if np.any(started & (character_rounds == never) & (mob_rounds == never)):
+        raise ValueError("Бой никогда не закончится")
+    character_wins = character_rounds <= mob_rounds
+    rounds = np.where(started, np.where(character_wins, character_rounds, mob_rounds), 0)
+    hits_taken = np.where(started, np.where(character_wins, rounds - 1, rounds), 0)
+    winner = np.where(started, np.where(character_wins, 1, -1), 0).astype(np.int8)
+    return FightResult(winner, rounds, health - hits_taken * loss, mob_health - rounds * attack)
+
+
+def fight(character: Character, mob: Mob) -> FightResult:
     """Функция отвечающая за реализацию боевой системы между игроком и мобом.
 
     Args:
         character (Character): объект персонажа, нашего игрока
         mob (Mob): объект моба, которые встречаются в данжах
+
+    Returns:
+        FightResult: итог боя
     """
-    while character.health > 0 and mob.health > 0:
-        mob.health -= character.attack
-        if mob.health <= 0:
-            print(f"{character.name} победил {mob.name}!")
-            break
-        character.health -= mob.attack
-        if character.health <= 0:
-            print(f"{mob.name} победил {character.name}.")
-            break
+    result = resolve_fight(character, mob)
+    if result.winner == "character":
+        print(f"{character.name} победил {mob.name}!")
+    elif result.winner == "mob":
+        print(f"{mob.name} победил {character.name}.")
+    return result
 
 
 def display_character_info(character: Character) -> None:
@@ -225,99 +880,139 @@ def display_character_info(character: Character) -> None:
 
 
 class DifficultyStrategy(ABC):
-    @abstractmethod
-    def generate_items(self: Self):
-        """Функция генерация вещей."""
-        pass
+    """Стратегия генерации мира для одной сложности.
 
-    @abstractmethod
-    def generate_mobs(self: Self):
-        """Функция генерация врагов."""
-        pass
+    Шаблоны вещей и мобов создаются один раз при объявлении класса и при генерации
+    копируются: здоровье мобов меняется в бою, а надетую вещь можно изменить на месте
+    (см. Character.update_item), и такие изменения не должны попадать в другие миры.
+    """
 
+    items: Tuple[Item, ...] = ()
+    mobs: Tuple[Mob, ...] = ()
+    # Таблицы выпадения с весами; если заданы, вещи и мобы выбираются из них, а не из items и mobs.
+    item_table: Optional[LootTable] = None
+    mob_table: Optional[LootTable] = None
+    drops: Tuple[int, int] = (1, 3)
 
-class EasyDifficulty(DifficultyStrategy):
-    def generate_items(self: Self) -> Item:
+    def generate_items(self: Self, rng: random.Random = random) -> List[Item]:
         """Функция генерация вещей."""
-        easy_items = [
-            Item(1, "Меч из обычного дерева", 0, 5, 0),
-            Item(2, "Кольчуга", 0, 0, 3),
-            Item(3, "Зелье лечения", 10, 0, 0),
-        ]
-        return random.sample(easy_items, random.randint(1, len(easy_items)))
+        if self.item_table is not None:
+            return self.item_table.draw_many(rng.randint(*self.drops), rng)
+        return [copy.copy(item) for item in rng.sample(self.items, rng.randint(1, len(self.items)))]
 
-    def generate_mobs(self: Self) -> Item:
+    def generate_mobs(self: Self, rng: random.Random = random) -> List[Mob]:
         """Функция генерация врагов."""
-        easy_mobs = [
-            Mob("Гоблин", 20, 5, 2),
-            Mob("Крыса", 5, 1, 0),
-        ]
-        return random.sample(easy_mobs, random.randint(1, len(easy_mobs)))
+        if self.mob_table is not None:
+            return self.mob_table.draw_many(rng.randint(*self.drops), rng)
+        return [copy.copy(mob) for mob in rng.sample(self.mobs, rng.randint(1, len(self.mobs)))]
 
 
-class MiddleDifficulty(DifficultyStrategy):
-    def generate_items(self: Self) -> Item:
-        """Функция генерация вещей."""
-        middle_items = [
-            Item(4, "Меч из закальеванной стали", 0, 10, 0),
-            Item(5, "Латный щит", 0, 0, 5),
-            Item(6, "Зелье силы", 0, 10, 0),
-        ]
-        return random.sample(middle_items, random.randint(1, len(middle_items)))
+DIFFICULTIES: Dict[str, DifficultyStrategy] = {}
 
-    def generate_mobs(self: Self) -> Item:
-        """Функция генерация врагов."""
-        middle_mobs = [
-            Mob("Орк", 30, 8, 3),
-            Mob("Гном", 15, 3, 1),
-        ]
-        return random.sample(middle_mobs, random.randint(1, len(middle_mobs)))
 
+def register_difficulty(name: str) -> Callable[[type], type]:
+    """Декоратор для регистрации новой сложности, после чего её можно выбрать в Game.set_difficulty.
+
+    Args:
+        name (str): название сложности
+    """
+
+    def decorator(strategy_class: type) -> type:
+        DIFFICULTIES[name] = strategy_class()
+        return strategy_class
+
+    return decorator
 
+
+@register_difficulty("easy")
+class EasyDifficulty(DifficultyStrategy):
+    items = (
+        Item(1, "Меч из обычного дерева", 0, 5, 0),
+        Item(2, "Кольчуга", 0, 0, 3),
+        Item(3, "Зелье лечения", 10, 0, 0),
+    )
+    mobs = (
+        Mob("Гоблин", 20, 5, 2),
+        Mob("Крыса", 5, 1, 0),
+    )
+
+
+@register_difficulty("middle")
+class MiddleDifficulty(DifficultyStrategy):
+    items = (
+        Item(4, "Меч из закальеванной стали", 0, 10, 0),
+        Item(5, "Латный щит", 0, 0, 5),
+        Item(6, "Зелье силы", 0, 10, 0),
+    )
+    mobs = (
+        Mob("Орк", 30, 8, 3),
+        Mob("Гном", 15, 3, 1),
+    )
+
+
+@register_difficulty("hard")
 class HardDifficulty(DifficultyStrategy):
-    def generate_items(self: Self) -> Item:
-        """Функция генерация вещей."""
-        hard_items = [
-            Item(7, "Меч из черного железа", 0, 15, 0),
-            Item(8, "Алмазная броня", 0, 0, 10),
-            Item(9, "Зелье защиты", 0, 0, 10),
-        ]
-        return random.sample(hard_items, random.randint(1, len(hard_items)))
+    items = (
+        Item(7, "Меч из черного железа", 0, 15, 0),
+        Item(8, "Алмазная броня", 0, 0, 10),
+        Item(9, "Зелье защиты", 0, 0, 10),
+    )
+    mobs = (
+        Mob("Тролль", 40, 10, 4),
+        Mob("Дракон", 50, 15, 5),
+    )
+
+
+def generate_worlds(
+    difficulty: str, n: int, seed: Optional[int] = None
+) -> List[Tuple[List[Item], List[Mob]]]:
+    """Функция генерации сразу нескольких миров одной сложности.
 
-    def generate_mobs(self: Self) -> Item:
-        """Функция генерация врагов."""
-        hard_mobs = [
-            Mob("Тролль", 40, 10, 4),
-            Mob("Дракон", 50, 15, 5),
-        ]
-        return random.sample(hard_mobs, random.randint(1, len(hard_mobs)))
+    Args:
+        difficulty (str): название зарегистрированной сложности
+        n (int): число миров
+        seed (Optional[int]): зерно генератора случайных чисел для воспроизводимости
+
+    Raises:
+        ValueError: ошибка вызываемая, если нет такой сложности
+
+    Returns:
+        List[Tuple[List[Item], List[Mob]]]: вещи и мобы каждого мира
+    """
+    strategy = DIFFICULTIES.get(difficulty)
+    if strategy is None:
+        raise ValueError("Invalid difficulty level")
+    rng = GameRandom(seed)
+    return [(strategy.generate_items(rng), strategy.generate_mobs(rng)) for _ in range(n)]
 
 
 class Game:
     """Класс игры, для генерации мобов, вещей и установки определенной сложности."""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[Union[int, str]] = None, rng: Optional[GameRandom] = None):
+        """
+        Args:
+            seed (Optional[Union[int, str]]): зерно генератора случайных чисел игры
+            rng (Optional[GameRandom]): готовый генератор, например дочерний поток GameRandom.spawn
+        """
         self.items = []
         self.mobs = []
         self.difficulty_strategy = None
+        self.rng = rng if rng is not None else GameRandom(seed)
 
-    def set_difficulty(self: Self, difficulty: Literal["easy", "middle", "hard"]):
+    def set_difficulty(self: Self, difficulty: str):
         """Функция для установки определенной сложности
 
         Args:
-            difficulty (Literal["easy", "middle", "hard"]): сложность игры
+            difficulty (str): сложность игры, одна из зарегистрированных (easy/middle/hard)
 
         Raises:
             ValueError: ошибка вызываемая, если нет введённой сложности
         """
-        if difficulty == "easy":
-            self.difficulty_strategy = EasyDifficulty()
-        elif difficulty == "middle":
-            self.difficulty_strategy = MiddleDifficulty()
-        elif difficulty == "hard":
-            self.difficulty_strategy = HardDifficulty()
-        else:
+        strategy = DIFFICULTIES.get(difficulty)
+        if strategy is None:
             raise ValueError("Invalid difficulty level")
+        self.difficulty_strategy = strategy
 
     def generate_world(self: Self):
         """Генерация мира, а именно вещей и вражеских мобов.
@@ -326,32 +1021,49 @@ class Game:
             ValueError: ошибка вызываемая, если игрок ввёл несуществующую сложность
         """
         if self.difficulty_strategy:
-            self.items = self.difficulty_strategy.generate_items()
-            self.mobs = self.difficulty_strategy.generate_mobs()
+            self.items = self.difficulty_strategy.generate_items(self.rng)
+            self.mobs = self.difficulty_strategy.generate_mobs(self.rng)
         else:
             raise ValueError("Difficulty strategy is not set")
 
 
+# Диалог с игроком: генератор выдает приглашения к вводу, получает ответы и возвращает персонажа.
+Dialog = Generator[str, str, Character]
+
+
 class Action(ABC):
-    """Абстрактный класс, представляющий из себя некоторое действие."""
+    """Абстрактный класс, представляющий из себя некоторое действие.
+
+    Название действия name задается на уровне класса, чтобы меню могло его
+    показать без создания объекта действия.
+    """
+
+    name: str = ""
 
     def __init__(self: Self, character: Character, game: Game) -> None:
         self.character = character
         self.game = game
 
     @abstractmethod
-    def execute(self: Self):
-        raise NotImplementedError("Метод execute должен быть реализован в подклассе")
+    def dialog(self: Self) -> Dialog:
+        """Диалог действия с игроком.
+
+        Генератор выдает через yield приглашение к вводу и получает ответ игрока
+        через send, выводит сообщения через print и возвращает персонажа.
+        """
+        raise NotImplementedError("Метод dialog должен быть реализован в подклассе")
+
+    def execute(self: Self) -> Character:
+        """Функция выполнения действия в консоли"""
+        return run_in_console(self.dialog())
 
 
 class GoToTavern(Action):
     """Класс действия для похода в таверну"""
 
-    def __init__(self: Self, character: Character, game: Game) -> None:
-        super().__init__(character, game)
-        self.name = "Пойти в таверну"
+    name = "Пойти в таверну"
 
-    def execute(self: Self) -> Character:
+    def dialog(self: Self) -> Dialog:
         """Функция ыполнение действия"""
         print("\nДобро пожаловать в таверну!")
         print("Вот наши напитки:")
@@ -366,11 +1078,11 @@ class GoToTavern(Action):
                 f"{i}. {drink.name} - Здоровье: {drink.health}, Атака: {drink.attack}, Защита: {drink.defense}, Цена: {drink.price}"
             )
         print(f"Деньги в казне: {self.character.inventory.money}")
-        drink_choice = input("Введите номер напитка, который вы хотите купить: ")
+        drink_choice = yield "Введите номер напитка, который вы хотите купить: "
         drink = drinks[int(drink_choice) - 1]
         if self.character.inventory.remove_money(drink.price):
             self.character.inventory.add_item(
-                Item(drink.name, drink.health, drink.attack, drink.defense)
+                Item(drink.id, drink.name, drink.health, drink.attack, drink.defense)
             )
             print(f"Вы купили {drink.name}!")
         else:
@@ -381,14 +1093,12 @@ class GoToTavern(Action):
 class GoToDungeon(Action):
     """Действие поход в данж, содержит в себе функцию выполнения этого действия, систему боёвки и наград."""
 
-    def __init__(self: Self, character: Character, game: Game) -> None:
-        super().__init__(character, game)
-        self.name = "Пойти в данж"
+    name = "Пойти в данж"
 
-    def execute(self: Self) -> Character:
+    def dialog(self: Self) -> Dialog:
         """Функция для выполнения действия"""
         print("\nДобро пожаловать в данж!")
-        mob = random.choice(self.game.mobs)
+        mob = self.game.rng.choice(self.game.mobs)
         print(
             f"{mob.name} приближается! Его урон {mob.attack}, защита {mob.defense} и здоровье {mob.health}"
         )
@@ -396,7 +1106,7 @@ class GoToDungeon(Action):
             print("\nВыберите действие:")
             print("1. Напасть")
             print("2. Убежать")
-            action = input("Введите номер действия: ")
+            action = yield "Введите номер действия: "
 
             if action == "1":
                 fight(self.character, mob)
@@ -404,14 +1114,14 @@ class GoToDungeon(Action):
                     print("Игра окончена!")
                     break
                 else:
-                    new_item = random.choice(self.game.items)
+                    new_item = self.game.rng.choice(self.game.items)
                     self.character.inventory.add_item(new_item)
                     print(
                         f"Вы победили моба, получили новый предмет '{new_item.name}' и успешно сбежали из данжа."
                     )
                     break
             elif action == "2":
-                if random.random() > 0.5:
+                if self.game.rng.random() > 0.5:
                     print("Вы успешно сбежали из данжа.")
                     break
                 else:
@@ -426,11 +1136,9 @@ class GoToDungeon(Action):
 class CheckInventory(Action):
     """Действие для проверки инвентаря и характеристик персонажа"""
 
-    def __init__(self: Self, character: Character, game: Game) -> None:
-        super().__init__(character, game)
-        self.name = "Посмотреть инвентарь"
+    name = "Посмотреть инвентарь"
 
-    def execute(self: Self) -> Character:
+    def dialog(self: Self) -> Dialog:
         """Функция для выполнения действия"""
 
         print("\nХарактеристики персонажа:")
@@ -443,13 +1151,13 @@ class CheckInventory(Action):
             print("1. Надеть вещь")
             print("2. Выкинуть вещь")
             print("3. Вернуться в меню")
-            action = input("Введите номер действия: ")
+            action = yield "Введите номер действия: "
 
             if action == "1":
-                item_id = int(input("Введите ID вещи для надевания: "))
+                item_id = int((yield "Введите ID вещи для надевания: "))
                 self.character.equip_item(item_id)
             elif action == "2":
-                item_id = int(input("Введите ID вещи для выкидывания: "))
+                item_id = int((yield "Введите ID вещи для выкидывания: "))
                 self.character.unequip_item(item_id)
             elif action == "3":
                 break
@@ -458,40 +1166,945 @@ class CheckInventory(Action):
         return self.character
 
 
-def main(actions: Dict[str, Action]) -> None:
-    """Функция представляющая основной функционал игры. Она отвечает за диалоговые окна отображаемые
-    в консоли в ходе игры и обработку входящих от игрока команд.
+Policy = Callable[[Character, Mob], Literal["1", "2"]]
+
+
+def always_attack(character: Character, mob: Mob) -> Literal["1", "2"]:
+    """Стратегия игрока для симуляции: всегда нападать."""
+    return "1"
+
+
+def always_flee(character: Character, mob: Mob) -> Literal["1", "2"]:
+    """Стратегия игрока для симуляции: всегда пытаться убежать."""
+    return "2"
+
+
+class DungeonOutcome(NamedTuple):
+    """Итог похода в данж: "won", "fled" или "died", оставшееся здоровье и имя полученной вещи."""
+
+    result: Literal["won", "fled", "died"]
+    health: int
+    loot: Optional[str]
+
+
+def run_dungeon(character: Character, game: Game, policy: Policy) -> DungeonOutcome:
+    """Функция похода в данж без ввода и вывода в консоль.
+
+    Повторяет логику GoToDungeon.execute, но выбор действия (1 - напасть, 2 - убежать)
+    делает стратегия policy.
 
     Args:
-        actions (Dict[str, Action]): словарь с действиями, которые может выполнять игрок в главном меню.
+        character (Character): объект персонажа
+        game (Game): игра со сгенерированным миром
+        policy (Policy): стратегия игрока, получающая персонажа и моба и возвращающая номер действия
+
+    Returns:
+        DungeonOutcome: итог похода в данж
     """
+    mob = game.rng.choice(game.mobs)
+    while True:
+        action = policy(character, mob)
+        if action == "1":
+            resolve_fight(character, mob)
+            if character.health <= 0:
+                return DungeonOutcome("died", character.health, None)
+            new_item = game.rng.choice(game.items)
+            character.inventory.add_item(new_item)
+            return DungeonOutcome("won", character.health, new_item.name)
+        elif action == "2":
+            if game.rng.random() > 0.5:
+                return DungeonOutcome("fled", character.health, None)
+            resolve_fight(character, mob)
+            if character.health <= 0:
+                return DungeonOutcome("died", character.health, None)
 
-    game = Game()
-    difficulty = input("Выберите уровень сложности (easy/middle/hard): ")
+
+@dataclass
+class SimulationReport:
+    """Статистика симуляции походов в данж для одной сложности."""
+
+    runs: int = 0
+    outcomes: Counter = field(default_factory=Counter)
+    health: Counter = field(default_factory=Counter)
+    loot: Counter = field(default_factory=Counter)
+
+    def add(self: Self, outcome: DungeonOutcome) -> None:
+        """Функция учета итога одного похода."""
+        self.runs += 1
+        self.outcomes[outcome.result] += 1
+        self.health[outcome.health] += 1
+        if outcome.loot is not None:
+            self.loot[outcome.loot] += 1
+
+    def merge(self: Self, other: "SimulationReport") -> None:
+        """Функция объединения со статистикой другой части симуляции."""
+        self.runs += other.runs
+        self.outcomes.update(other.outcomes)
+        self.health.update(other.health)
+        self.loot.update(other.loot)
+
+    @property
+    def win_rate(self: Self) -> float:
+        """Доля побед над мобом."""
+        return self.outcomes["won"] / self.runs if self.runs else 0.0
+
+    def survival_curve(self: Self) -> List[Tuple[int, float]]:
+        """Функция построения кривой выживаемости.
+
+        Returns:
+            List[Tuple[int, float]]: пары (здоровье h, доля походов, закончившихся со здоровьем не меньше h).
+        """
+        curve = []
+        remaining = self.runs
+        for health in sorted(self.health):
+            curve.append((health, remaining / self.runs))
+            remaining -= self.health[health]
+        return curve
+
+
+def _simulate_chunk(
+    difficulty: str, runs: int, policy: Policy, seed: int, stats: Tuple[int, int, int]
+) -> SimulationReport:
+    """Симуляция части походов в данж в одном процессе."""
+    rng = GameRandom(seed)
+    report = SimulationReport()
+    for run in range(runs):
+        # Отдельный поток на каждый поход: любой поход можно повторить по зерну f"{seed}/{run}".
+        game = Game(rng=rng.spawn(run))
+        game.set_difficulty(difficulty)
+        game.generate_world()
+        report.add(run_dungeon(Character("Бот", *stats), game, policy))
+    return report
+
+
+def simulate(
+    difficulties: Sequence[str] = ("easy", "middle", "hard"),
+    runs: int = 10_000,
+    policy: Policy = always_attack,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    chunk_size: int = 1_000,
+    stats: Tuple[int, int, int] = (100, 10, 5),
+) -> Dict[str, SimulationReport]:
+    """Функция симуляции множества походов в данж на нескольких процессах.
+
+    Походы каждой сложности разбиваются на части по chunk_size, каждая часть выполняется
+    в отдельном процессе со своим зерном генератора случайных чисел, полученным из seed,
+    поэтому результат воспроизводим при одинаковых seed и chunk_size.
+
+    Args:
+        difficulties (Sequence[str]): сложности для симуляции
+        runs (int): число походов для каждой сложности
+        policy (Policy): стратегия игрока, функция уровня модуля (передается в процессы)
+        seed (int): зерно для генерации зерен частей
+        workers (Optional[int]): число процессов, по умолчанию - число ядер процессора
+        chunk_size (int): число походов в одной части
+        stats (Tuple[int, int, int]): здоровье, атака и защита персонажа
+
+    Returns:
+        Dict[str, SimulationReport]: статистика по каждой сложности
+    """
+    seeds = random.Random(seed)
+    reports = {difficulty: SimulationReport() for difficulty in difficulties}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for difficulty in difficulties:
+            for start in range(0, runs, chunk_size):
+                chunk_runs = min(chunk_size, runs - start)
+                future = executor.submit(
+                    _simulate_chunk, difficulty, chunk_runs, policy, seeds.getrandbits(64), stats
+                )
+                futures.append((difficulty, future))
+        for difficulty, future in futures:
+            reports[difficulty].merge(future.result())
+    return reports
+
+
+def run_in_console(dialog: Dialog) -> Character:
+    """Функция проведения диалога в консоли: приглашения выводятся через input, ответы читаются из консоли.
+
+    Args:
+        dialog (Dialog): диалог действия или всей игры
+
+    Returns:
+        Character: персонаж, возвращенный диалогом
+    """
+    try:
+        prompt = next(dialog)
+        while True:
+            prompt = dialog.send(input(prompt))
+    except StopIteration as stop:
+        return stop.value
+
+
+def game_dialog(actions: Dict[str, Type[Action]], seed: Optional[Union[int, str]] = None) -> Dialog:
+    """Диалог всей игры: выбор сложности, создание персонажа и главное меню.
+
+    Args:
+        actions (Dict[str, Type[Action]]): словарь с действиями, которые может выполнять игрок в главном меню.
+        seed (Optional[Union[int, str]]): зерно генератора случайных чисел игры
+    """
+    game = Game(seed)
+    difficulty = yield "Выберите уровень сложности (easy/middle/hard): "
     game.set_difficulty(difficulty)
     game.generate_world()
 
-    character_name = input("Введите имя вашего персонажа: ")
+    character_name = yield "Введите имя вашего персонажа: "
     character = Character(character_name, 100, 10, 5)
 
     while True:
         print("\nВыберите действие:")
         for number, action in actions.items():
-            print(f"{number}. {action(character, game).name}")
+            print(f"{number}. {action.name}")
 
-        action_choice = input("Введите номер действия: ")
+        action_choice = yield "Введите номер действия: "
         action = actions.get(action_choice)
 
         if action:
-            character = action(character, game).execute()
+            character = yield from action(character, game).dialog()
         else:
             print("Неверный ввод. Пожалуйста, выберите действие из предложенных.")
 
 
-if __name__ == "__main__":
-    actions = {
-        "1": GoToTavern,
-        "2": GoToDungeon,
-        "3": CheckInventory,
+def main(actions: Dict[str, Type[Action]]) -> None:
+    """Функция представляющая основной функционал игры. Она отвечает за диалоговые окна отображаемые
+    в консоли в ходе игры и обработку входящих от игрока команд.
+
+    Args:
+        actions (Dict[str, Type[Action]]): словарь с действиями, которые может выполнять игрок в главном меню.
+    """
+    run_in_console(game_dialog(actions))
+
+
+async def run_session(
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue,
+    actions: Optional[Dict[str, Type[Action]]] = None,
+    seed: Optional[Union[int, str]] = None,
+) -> None:
+    """Сессия игры, управляемая очередями, для обслуживания многих игроков в одном процессе.
+
+    Ответы игрока читаются из inbox, а весь вывод игры вместе с приглашением к вводу
+    кладется одной строкой в outbox. Между ответами игрока код игры выполняется
+    синхронно, поэтому вывод print перехватывается только на это время. Сессия
+    завершается, когда в inbox приходит None или игра падает с ошибкой; в конце
+    в outbox кладется None.
+
+    Args:
+        inbox (asyncio.Queue): очередь ответов игрока
+        outbox (asyncio.Queue): очередь вывода игры
+        actions (Optional[Dict[str, Type[Action]]]): действия главного меню, по умолчанию ACTIONS
+        seed (Optional[Union[int, str]]): зерно генератора случайных чисел игры
+    """
+    dialog = game_dialog(ACTIONS if actions is None else actions, seed)
+    output = io.StringIO()
+    answer = None
+    try:
+        while True:
+            try:
+                with contextlib.redirect_stdout(output):
+                    prompt = dialog.send(answer)
+            except Exception as error:
+                await outbox.put(f"{output.getvalue()}Ошибка: {error}\n")
+                break
+            await outbox.put(output.getvalue() + prompt)
+            output.seek(0)
+            output.truncate()
+            answer = await inbox.get()
+            if answer is None:
+                break
+    finally:
+        dialog.close()
+        await outbox.put(None)
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8888,
+    idle_timeout: float = 300.0,
+    actions: Optional[Dict[str, Type[Action]]] = None,
+    backlog: int = 1024,
+) -> asyncio.AbstractServer:
+    """Функция запуска сервера игры по TCP.
+
+    Каждое подключение получает свою сессию run_session. Клиент отправляет ответы
+    построчно, а вывод игры отправляется ему текстом в UTF-8. Подключение закрывается,
+    если клиент не отвечает дольше idle_timeout секунд или присылает строку длиннее
+    лимита StreamReader (64 КиБ).
+
+    Args:
+        host (str): адрес сервера
+        port (int): порт сервера, 0 - выбрать свободный порт
+        idle_timeout (float): время бездействия клиента в секундах до закрытия сессии
+        actions (Optional[Dict[str, Type[Action]]]): действия главного меню, по умолчанию ACTIONS
+        backlog (int): длина очереди ожидающих подключений
+
+    Returns:
+        asyncio.AbstractServer: запущенный сервер
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await _handle_connection(reader, writer, actions, idle_timeout)
+
+    return await asyncio.start_server(handle, host, port, backlog=backlog)
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    actions: Optional[Dict[str, Type[Action]]],
+    idle_timeout: float,
+) -> None:
+    """Обслуживание одного подключения: чтение ответов клиента и передача их в сессию."""
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    session = asyncio.create_task(run_session(inbox, outbox, actions))
+    sender = asyncio.create_task(_send_output(outbox, writer))
+    try:
+        while True:
+            line = await asyncio.wait_for(reader.readline(), idle_timeout)
+            if not line:
+                break
+            await inbox.put(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    except ValueError:
+        # readline превращает LimitOverrunError в ValueError: строка клиента длиннее лимита
+        # буфера, ее остаток нельзя отделить от следующих ответов, поэтому сессия завершается.
+        pass
+    finally:
+        await inbox.put(None)
+        await session
+        await sender
+
+
+async def _send_output(outbox: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+    """Отправка вывода сессии клиенту: все накопившиеся сообщения отправляются одной записью."""
+    try:
+        finished = False
+        while not finished:
+            chunks = []
+            message = await outbox.get()
+            while True:
+                if message is None:
+                    finished = True
+                    break
+                chunks.append(message)
+                if outbox.empty():
+                    break
+                message = outbox.get_nowait()
+            if chunks:
+                writer.write("".join(chunks).encode("utf-8"))
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+ACTIONS: Dict[str, Type[Action]] = {
+    "1": GoToTavern,
+    "2": GoToDungeon,
+    "3": CheckInventory,
+}
+
+
+# Формат файла сохранения: заголовок, записи персонажей, вещей и мобов фиксированной длины,
+# состояние генератора случайных чисел игры (если есть), таблица смещений строк и сами строки.
+# Все строки (имена персонажей, вещей, мобов, сложность, зерно) хранятся один раз в таблице строк.
+# Состояние генератора: 625 слов Mersenne Twister, сохраненное значение gauss и признак его
+# наличия, use_numpy и номер строки с состоянием генератора numpy в JSON (-1, если его нет).
+_SAVE_MAGIC = b"OOPS"
+_SAVE_VERSION = 2
+_SAVE_HEADER = struct.Struct("<4sHxxIIIIiiIIB3x")
+_SAVE_CHARACTER = struct.Struct("<IqqqqqIIII")
+_SAVE_ITEM = struct.Struct("<qIqqq")
+_SAVE_MOB = struct.Struct("<IqqqB7x")
+_SAVE_RNG = struct.Struct("<625IdBBxxi")
+_SAVE_OFFSET = struct.Struct("<I")
+_MOB_KINDS: Tuple[Type[Mob], ...] = (Mob, Goblin, Orc)
+
+
+class _StringTable:
+    """Таблица строк файла сохранения: каждая строка записывается один раз."""
+
+    def __init__(self: Self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self: Self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def pack(self: Self) -> bytes:
+        blobs = [value.encode("utf-8") for value in self.strings]
+        offsets = array("I", [0])
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        return offsets.tobytes() + b"".join(blobs)
+
+
+def _difficulty_name(game: Game) -> Optional[str]:
+    """Название зарегистрированной сложности игры."""
+    for name, strategy in DIFFICULTIES.items():
+        if strategy is game.difficulty_strategy:
+            return name
+    return None
+
+
+def save_snapshot(path: str, characters: Sequence[Character], game: Optional[Game] = None) -> None:
+    """Функция сохранения персонажей и мира игры в компактный двоичный файл.
+
+    Файл формируется в памяти целиком и записывается одним вызовом write.
+
+    Args:
+        path (str): путь к файлу сохранения
+        characters (Sequence[Character]): сохраняемые персонажи
+        game (Optional[Game]): сохраняемая игра: сложность, вещи, мобы и состояние генератора случайных чисел
+    """
+    strings = _StringTable()
+    character_records = []
+    item_records = []
+
+    def add_items(items: Iterable[Item]) -> Tuple[int, int]:
+        start = len(item_records)
+        for item in items:
+            item_records.append(
+                _SAVE_ITEM.pack(item.id, strings.add(item.name), item.health, item.attack, item.defense)
+            )
+        return start, len(item_records) - start
+
+    for character in characters:
+        inventory_start, inventory_count = add_items(character.inventory.items)
+        equipment_start, equipment_count = add_items(character.equipped_items)
+        character_records.append(
+            _SAVE_CHARACTER.pack(
+                strings.add(character.name),
+                character.base_health,
+                character.base_attack,
+                character.base_defense,
+                character._health,
+                character.inventory.money,
+                inventory_start,
+                inventory_count,
+                equipment_start,
+                equipment_count,
+            )
+        )
+
+    mob_records = []
+    rng_state = b""
+    difficulty = seed = -1
+    world_start = world_count = 0
+    if game is not None:
+        world_start, world_count = add_items(game.items)
+        for mob in game.mobs:
+            mob_records.append(
+                _SAVE_MOB.pack(
+                    strings.add(mob.name), mob.health, mob.attack, mob.defense, _MOB_KINDS.index(type(mob))
+                )
+            )
+        name = _difficulty_name(game)
+        difficulty = -1 if name is None else strings.add(name)
+        seed = strings.add(json.dumps(game.rng.initial_seed))
+        _, state, gauss_next = game.rng.getstate()
+        generator = game.rng._numpy
+        numpy_state = -1 if generator is None else strings.add(json.dumps(generator.bit_generator.state))
+        rng_state = _SAVE_RNG.pack(
+            *state, gauss_next or 0.0, gauss_next is not None, game.rng.use_numpy, numpy_state
+        )
+
+    header = _SAVE_HEADER.pack(
+        _SAVE_MAGIC,
+        _SAVE_VERSION,
+        len(character_records),
+        len(item_records),
+        len(mob_records),
+        len(strings.strings),
+        difficulty,
+        seed,
+        world_start,
+        world_count,
+        game is not None,
+    )
+    with open(path, "wb") as file:
+        file.write(
+            b"".join(
+                [header, *character_records, *item_records, *mob_records, rng_state, strings.pack()]
+            )
+        )
+
+
+class Snapshot:
+    """Файл сохранения, открытый через mmap.
+
+    Персонажи восстанавливаются лениво: при обращении snapshot[i] читаются только записи
+    этого персонажа и его вещей, поэтому открытие файла с миллионом персонажей не требует
+    их разбора. Используется как последовательность персонажей и как контекстный менеджер.
+    """
+
+    def __init__(self: Self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self._characters,
+            items,
+            self._mobs,
+            strings,
+            self._difficulty,
+            self._seed,
+            self._world_start,
+            self._world_count,
+            self.has_game,
+        ) = _SAVE_HEADER.unpack_from(self._mmap, 0)
+        if magic != _SAVE_MAGIC or version != _SAVE_VERSION:
+            self._mmap.close()
+            raise ValueError("Неизвестный формат файла сохранения")
+        self._items_offset = _SAVE_HEADER.size + self._characters * _SAVE_CHARACTER.size
+        self._mobs_offset = self._items_offset + items * _SAVE_ITEM.size
+        self._rng_offset = self._mobs_offset + self._mobs * _SAVE_MOB.size
+        self._offsets_offset = self._rng_offset + (_SAVE_RNG.size if self.has_game else 0)
+        self._strings_offset = self._offsets_offset + (strings + 1) * _SAVE_OFFSET.size
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self: Self) -> None:
+        """Функция закрытия файла сохранения."""
+        self._mmap.close()
+
+    def __len__(self: Self) -> int:
+        return self._characters
+
+    def __getitem__(self: Self, index: int) -> Character:
+        if index < 0:
+            index += self._characters
+        if not 0 <= index < self._characters:
+            raise IndexError("Нет персонажа с таким номером")
+        (
+            name,
+            base_health,
+            base_attack,
+            base_defense,
+            health,
+            money,
+            inventory_start,
+            inventory_count,
+            equipment_start,
+            equipment_count,
+        ) = _SAVE_CHARACTER.unpack_from(self._mmap, _SAVE_HEADER.size + index * _SAVE_CHARACTER.size)
+        character = Character(self._string(name), base_health, base_attack, base_defense)
+        character._health = health
+        character.inventory.money = money
+        for item in self._read_items(inventory_start, inventory_count):
+            character.inventory.add_item(item)
+        for item in self._read_items(equipment_start, equipment_count):
+            character.equipment.add_item(item)
+        character.refresh_stats()
+        return character
+
+    def load_game(self: Self) -> Optional[Game]:
+        """Функция восстановления сохраненной игры.
+
+        Returns:
+            Optional[Game]: игра или None, если игра не была сохранена
+        """
+        if not self.has_game:
+            return None
+        *state, gauss_next, has_gauss_next, use_numpy, numpy_state = _SAVE_RNG.unpack_from(
+            self._mmap, self._rng_offset
+        )
+        game = Game(rng=GameRandom(json.loads(self._string(self._seed)), bool(use_numpy)))
+        if numpy_state >= 0:
+            # Генератор numpy создается до восстановления состояния random: при создании он берет из него зерно.
+            game.rng._generator().bit_generator.state = json.loads(self._string(numpy_state))
+        game.rng.setstate((3, tuple(state), gauss_next if has_gauss_next else None))
+        if self._difficulty >= 0:
+            game.set_difficulty(self._string(self._difficulty))
+        game.items = self._read_items(self._world_start, self._world_count)
+        for index in range(self._mobs):
+            name, health, attack, defense, kind = _SAVE_MOB.unpack_from(
+                self._mmap, self._mobs_offset + index * _SAVE_MOB.size
+            )
+            game.mobs.append(_MOB_KINDS[kind](self._string(name), health, attack, defense))
+        return game
+
+    def _read_items(self: Self, start: int, count: int) -> List[Item]:
+        items = []
+        for index in range(start, start + count):
+            item_id, name, health, attack, defense = _SAVE_ITEM.unpack_from(
+                self._mmap, self._items_offset + index * _SAVE_ITEM.size
+            )
+            items.append(Item(item_id, self._string(name), health, attack, defense))
+        return items
+
+    def _string(self: Self, index: int) -> str:
+        position = self._offsets_offset + index * _SAVE_OFFSET.size
+        (begin,) = _SAVE_OFFSET.unpack_from(self._mmap, position)
+        (end,) = _SAVE_OFFSET.unpack_from(self._mmap, position + _SAVE_OFFSET.size)
+        return sys.intern(str(self._mmap[self._strings_offset + begin : self._strings_offset + end], "utf-8"))
+
+
+def snapshot_to_json(characters: Sequence[Character], game: Optional[Game] = None) -> str:
+    """Функция выгрузки персонажей и игры в JSON для отладки.
+
+    Args:
+        characters (Sequence[Character]): персонажи
+        game (Optional[Game]): игра
+
+    Returns:
+        str: JSON-документ
+    """
+
+    def item_to_dict(item: Item) -> Dict[str, object]:
+        return {
+            "id": item.id,
+            "name": item.name,
+            "health": item.health,
+            "attack": item.attack,
+            "defense": item.defense,
+        }
+
+    document: Dict[str, object] = {
+        "characters": [
+            {
+                "name": character.name,
+                "base_health": character.base_health,
+                "base_attack": character.base_attack,
+                "base_defense": character.base_defense,
+                "health": character._health,
+                "money": character.inventory.money,
+                "inventory": [item_to_dict(item) for item in character.inventory.items],
+                "equipped": [item_to_dict(item) for item in character.equipped_items],
+            }
+            for character in characters
+        ]
     }
-    main(actions)
+    if game is not None:
+        document["game"] = {
+            "difficulty": _difficulty_name(game),
+            "seed": game.rng.initial_seed,
+            "use_numpy": game.rng.use_numpy,
+            "items": [item_to_dict(item) for item in game.items],
+            "mobs": [
+                {
+                    "kind": type(mob).__name__,
+                    "name": mob.name,
+                    "health": mob.health,
+                    "attack": mob.attack,
+                    "defense": mob.defense,
+                }
+                for mob in game.mobs
+            ],
+        }
+    return json.dumps(document, ensure_ascii=False, indent=2)
+
+
+class Metrics:
+    """Счетчики вызовов, гистограммы времени и изменения числа блоков памяти для горячих мест игры.
+
+    Заполняется только после enable_metrics. net_blocks - суммарное изменение
+    sys.getallocatedblocks за время вызовов: выделенные минус освобожденные блоки, поэтому
+    оно может быть отрицательным. Число самих выделений показывает профилирование profile_ticks.
+    """
+
+    # Верхние границы корзин гистограммы времени вызова, в секундах.
+    BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float("inf"))
+
+    def __init__(self: Self) -> None:
+        self.calls: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.net_blocks: Counter = Counter()
+        self.latency: Dict[str, List[int]] = {}
+        self.fight_rounds: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def record(self: Self, name: str, seconds: float, net_blocks: int) -> None:
+        """Функция учета одного вызова.
+
+        Args:
+            name (str): название измеряемого места
+            seconds (float): время вызова
+            net_blocks (int): изменение числа выделенных блоков памяти за время вызова
+        """
+        with self.lock:
+            self.calls[name] += 1
+            self.seconds[name] += seconds
+            self.net_blocks[name] += net_blocks
+            buckets = self.latency.setdefault(name, [0] * len(self.BUCKETS))
+            for index, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    buckets[index] += 1
+                    break
+
+    def report(self: Self) -> str:
+        """Функция формирования текстового отчета.
+
+        Returns:
+            str: по строке на каждое измеряемое место и распределение числа раундов боя
+        """
+        with self.lock:
+            lines = []
+            for name in sorted(self.calls):
+                calls = self.calls[name]
+                lines.append(
+                    f"{name}: вызовов {calls}, среднее время {self.seconds[name] / calls * 1e6:.1f} мкс, "
+                    f"изменение числа блоков {self.net_blocks[name]:+d}"
+                )
+            if self.fight_rounds:
+                rounds = ", ".join(f"{key}: {value}" for key, value in sorted(self.fight_rounds.items()))
+                lines.append(f"раунды боя: {rounds}")
+            return "\n".join(lines) + "\n"
+
+    def prometheus(self: Self) -> str:
+        """Функция выгрузки метрик в текстовом формате Prometheus.
+
+        Returns:
+            str: текст метрик
+        """
+        with self.lock:
+            lines = ["# TYPE game_call_seconds histogram"]
+            for name in sorted(self.calls):
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, self.latency[name]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'game_call_seconds_bucket{{name="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'game_call_seconds_sum{{name="{name}"}} {self.seconds[name]}')
+                lines.append(f'game_call_seconds_count{{name="{name}"}} {self.calls[name]}')
+            lines.append("# TYPE game_net_allocated_blocks gauge")
+            for name in sorted(self.calls):
+                lines.append(f'game_net_allocated_blocks{{name="{name}"}} {self.net_blocks[name]}')
+            lines.append("# TYPE game_fight_rounds counter")
+            for rounds, count in sorted(self.fight_rounds.items()):
+                lines.append(f'game_fight_rounds{{rounds="{rounds}"}} {count}')
+            return "\n".join(lines) + "\n"
+
+    def write_prometheus(self: Self, path: str) -> None:
+        """Функция записи метрик в файл в формате Prometheus."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.prometheus())
+
+    def write_periodically(self: Self, path: str, interval: float, prometheus: bool = True) -> threading.Event:
+        """Функция периодической записи метрик в файл в фоновом потоке.
+
+        Args:
+            path (str): путь к файлу
+            interval (float): период записи в секундах
+            prometheus (bool): формат Prometheus или текстовый отчет
+
+        Returns:
+            threading.Event: событие, установка которого останавливает запись
+        """
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(self.prometheus() if prometheus else self.report())
+
+        threading.Thread(target=run, daemon=True).start()
+        return stop
+
+
+METRICS: Optional[Metrics] = None
+_UNINSTRUMENTED: Dict[Tuple[object, str], object] = {}
+_PROFILE_WINDOWS: List["_ProfileWindow"] = []
+
+
+def _timed(metrics: Metrics, name: str, function: Callable) -> Callable:
+    """Обертка функции, записывающая время и изменение числа блоков памяти каждого вызова в metrics."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.record(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+    return wrapper
+
+
+def _timed_fight(metrics: Metrics, function: Callable) -> Callable:
+    """Обертка resolve_fight, дополнительно учитывающая число раундов боя."""
+    timed = _timed(metrics, "resolve_fight", function)
+
+    @functools.wraps(function)
+    def wrapper(character: Character, mob: Mob) -> FightResult:
+        result = timed(character, mob)
+        with metrics.lock:
+            metrics.fight_rounds[result.rounds] += 1
+        return result
+
+    return wrapper
+
+
+def _timed_dialog(metrics: Metrics, name: str, method: Callable[[Action], Dialog]) -> Callable[[Action], Dialog]:
+    """Обертка диалога действия: учитывается только время выполнения кода, без ожидания ответов игрока.
+
+    Завершение каждого диалога считается одним тиком игры. Метрики пишутся в объект metrics,
+    с которым создана обертка, поэтому диалог, начатый до disable_metrics, завершается без ошибок.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: Action) -> Dialog:
+        dialog = method(self)
+        seconds = 0.0
+        blocks = 0
+        answer = None
+        try:
+            while True:
+                before = sys.getallocatedblocks()
+                start = time.perf_counter()
+                try:
+                    prompt = dialog.send(answer)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    seconds += time.perf_counter() - start
+                    blocks += sys.getallocatedblocks() - before
+                answer = yield prompt
+        finally:
+            dialog.close()
+            metrics.record(name, seconds, blocks)
+            for window in list(_PROFILE_WINDOWS):
+                window.tick()
+
+    return wrapper
+
+
+def enable_metrics(metrics: Optional[Metrics] = None) -> Metrics:
+    """Функция включения сбора метрик.
+
+    Измеряемые функции и методы (resolve_fight, надевание и снятие вещей, generate_world
+    и диалоги всех действий) подменяются обертками. Пока метрики выключены, обертки
+    не установлены, и измерение ничего не стоит. Функции, импортированные из модуля
+    через from task5_2 import ..., не подменяются.
+
+    Args:
+        metrics (Optional[Metrics]): объект для сбора метрик, по умолчанию создается новый
+
+    Returns:
+        Metrics: объект, в который собираются метрики
+    """
+    global METRICS
+    disable_metrics()
+    METRICS = metrics = Metrics() if metrics is None else metrics
+    module = sys.modules[__name__]
+    targets: List[Tuple[object, str, Callable]] = [
+        (module, "resolve_fight", _timed_fight(metrics, resolve_fight)),
+        (Game, "generate_world", _timed(metrics, "generate_world", Game.generate_world)),
+    ]
+    for name in ("equip_item", "unequip_item", "equip_items", "unequip_items"):
+        targets.append((Character, name, _timed(metrics, name, getattr(Character, name))))
+    for action in set(ACTIONS.values()) | set(Action.__subclasses__()):
+        targets.append((action, "dialog", _timed_dialog(metrics, action.__name__, action.dialog)))
+    for owner, name, wrapper in targets:
+        _UNINSTRUMENTED[owner, name] = getattr(owner, name)
+        setattr(owner, name, wrapper)
+    return METRICS
+
+
+def disable_metrics() -> None:
+    """Функция выключения сбора метрик и возврата исходных функций."""
+    global METRICS
+    for (owner, name), original in _UNINSTRUMENTED.items():
+        setattr(owner, name, original)
+    _UNINSTRUMENTED.clear()
+    METRICS = None
+
+
+class _ProfileWindow:
+    """Окно профилирования cProfile и tracemalloc длиной в заданное число тиков игры."""
+
+    def __init__(self: Self, ticks: int, path: str) -> None:
+        self.remaining = ticks
+        self.path = path
+        self.profiler = cProfile.Profile()
+        self.active = False
+        self.started_tracing = False
+
+    def start(self: Self) -> None:
+        self.active = True
+        # tracemalloc, включенный до окна кем-то другим, окно не выключает.
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.profiler.enable()
+
+    def tick(self: Self) -> None:
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.stop()
+
+    def stop(self: Self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.profiler.dump_stats(f"{self.path}.prof")
+        with open(f"{self.path}.memory.txt", "w", encoding="utf-8") as file:
+            for stat in snapshot.statistics("lineno")[:50]:
+                file.write(f"{stat}\n")
+        if self in _PROFILE_WINDOWS:
+            _PROFILE_WINDOWS.remove(self)
+
+
+@contextlib.contextmanager
+def profile_ticks(ticks: int, path: str) -> Iterator[_ProfileWindow]:
+    """Контекстный менеджер, включающий cProfile и tracemalloc на ticks тиков игры.
+
+    Тиком считается завершение диалога любого действия, поэтому метрики должны быть
+    включены через enable_metrics. Профиль сохраняется в файл path.prof (формат pstats),
+    а самые большие места выделения памяти - в path.memory.txt. Если контекст закрыт
+    раньше, чем прошло ticks тиков, профилирование останавливается при выходе. Окна не могут
+    пересекаться: cProfile не умеет профилировать двумя профилировщиками одновременно.
+
+    Args:
+        ticks (int): число тиков игры
+        path (str): префикс путей к файлам результатов
+
+    Raises:
+        RuntimeError: ошибка вызываемая, если метрики не включены или уже идет другое окно профилирования
+    """
+    if METRICS is None:
+        raise RuntimeError("Метрики не включены, вызовите enable_metrics()")
+    if _PROFILE_WINDOWS:
+        raise RuntimeError("Профилирование уже идет, окна profile_ticks не могут пересекаться")
+    window = _ProfileWindow(ticks, path)
+    _PROFILE_WINDOWS.append(window)
+    window.start()
+    try:
+        yield window
+    finally:
+        window.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+
+        async def run_server(port: int) -> None:
+            server = await serve(port=port)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(run_server(int(sys.argv[2]) if len(sys.argv) > 2 else 8888))
+    else:
+        main(ACTIONS)